@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Misura la latenza degli avvisi dalla pubblicazione alla consegna: feed RSS
+locali con articoli appena pubblicati, raccolta, punteggio e regole di
+allerta, consegna a un webhook locale (eventualmente lento). Mostra anche
+che il tempo di elaborazione non dipende dalla lentezza del webhook.
+Uso: python benchmarks/bench_alerts.py [--rounds 5] [--sources 4] [--webhook-delay 0.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors'))
+sys.path.append(os.path.dirname(__file__))
+
+from aggregate_state import AggregateState
+from alerting import AlertDispatcher, AlertEngine, WebhookSink
+from data_processor import DataProcessor
+from feed_server import FeedServer, make_rss
+from news_collector import NewsCollector
+from webhook_server import WebhookServer
+
+HEADLINES = [
+    ('Russia launches missile attack as war fears grow', 'Nuclear threat and invasion warnings from Moscow.'),
+    ('Ukraine reports military buildup near the border', 'Kyiv says tension is rising after the strikes.'),
+    ('Diplomacy talks resume in Geneva', 'Negotiators meet again next week.'),
+]
+
+
+def round_items(round_number: int, source: int):
+    """Voci appena pubblicate: una per titolo, con link diversi a ogni giro"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        {'title': f'{title} ({round_number}.{source})', 'description': description,
+         'link': f'http://localhost/r{round_number}/s{source}/{i}', 'published': now}
+        for i, (title, description) in enumerate(HEADLINES)
+    ]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark latenza degli avvisi')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--sources', type=int, default=4)
+    parser.add_argument('--webhook-delay', type=float, default=0.5, help='Ritardo di ogni risposta del webhook (s)')
+    parser.add_argument('--feed-delay', type=float, default=0.05)
+    parser.add_argument('--output', default=None, help='File JSON dei risultati')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, WebhookServer(delay=args.webhook_delay) as webhook:
+        # Stato e dati processati nella directory temporanea
+        os.chdir(workdir)
+        feeds = {f'/source_{i}.xml': (make_rss([]), args.feed_delay) for i in range(args.sources)}
+        with FeedServer(feeds) as server:
+            collector = NewsCollector(cache_path=None, dedup_path=None, poll_state_path=None)
+            collector.rss_feeds = {path.strip('/').replace('.xml', ''): server.url(path) for path in feeds}
+            processor = DataProcessor()
+            processor.alerts = AlertEngine(AlertDispatcher([WebhookSink(webhook.url())], max_per_minute=1000),
+                                           state_path=os.path.join(workdir, 'alerts_state.json'))
+            state = AggregateState(os.path.join(workdir, 'aggregate_state.json'))
+
+            rounds = []
+            for round_number in range(args.rounds):
+                for i in range(args.sources):
+                    feeds[f'/source_{i}.xml'] = (make_rss(round_items(round_number, i)), args.feed_delay)
+
+                start = time.perf_counter()
+                articles = collector.collect_news(hours_back=1, concurrent=True)
+                collected = time.perf_counter() - start
+                processor.process_incremental(state, articles, [])
+                processed = time.perf_counter() - start - collected
+                rounds.append({'articles': len(articles), 'collect_seconds': round(collected, 3),
+                               'process_seconds': round(processed, 3)})
+
+            processor.alerts.close(timeout=args.rounds * args.sources * (args.webhook_delay + 1))
+        os.chdir(cwd)
+
+    latencies = [
+        (arrived - datetime.fromisoformat(alert['published'])).total_seconds()
+        for arrived, alert in webhook.received
+    ]
+    rules = {}
+    for _, alert in webhook.received:
+        rules[alert['rule']] = rules.get(alert['rule'], 0) + 1
+
+    print(f"\n{'round':>5} {'articles':>9} {'collect':>9} {'process':>9}")
+    for number, result in enumerate(rounds):
+        print(f"{number:>5} {result['articles']:>9} {result['collect_seconds']:>8.2f}s {result['process_seconds']:>8.2f}s")
+    print(f"\nAlerts delivered: {len(webhook.received)} {rules}")
+    print(f"  {processor.alerts.summary()}")
+    print(f"Publication -> webhook latency: p50 {percentile(latencies, 0.5):.2f}s  "
+          f"p95 {percentile(latencies, 0.95):.2f}s  max {max(latencies, default=float('nan')):.2f}s")
+    print(f"  (pubDate has one-second resolution; webhook delay {args.webhook_delay}s per alert, "
+          f"not included in the processing times)")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'benchmark': 'alert_latency',
+                'webhook_delay': args.webhook_delay,
+                'rounds': rounds,
+                'alerts': len(webhook.received),
+                'alerts_by_rule': rules,
+                'latency_p50': percentile(latencies, 0.5),
+                'latency_p95': percentile(latencies, 0.95),
+                'latency_max': max(latencies, default=None)
+            }, f, indent=2)
+        print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
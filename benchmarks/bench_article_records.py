@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Confronta i dict per articolo (ciclo di raccolta precedente) con i record
+Article (__slots__): tempo di costruzione dalle voci di un feed, memoria
+occupata e conversione in blocco in DataFrame e tabella Arrow.
+Il punteggio di tensione, uguale nei due casi, è escluso dalla misura.
+Uso: python benchmarks/bench_article_records.py [--entries 1000000] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors'))
+
+from article_record import Article, articles_to_frame, articles_to_table
+
+
+def feed_entries(count: int):
+    """Voci come quelle di feedparser (dict con published_parsed), una su 50 senza data"""
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            'title': f'Story {i}: military tension rises near the border',
+            'summary': f'Diplomacy efforts continue as sanctions are discussed ({i}).',
+            'link': f'http://localhost/story/{i}',
+            'published_parsed': None if i % 50 == 0 else (start + timedelta(seconds=i)).timetuple()
+        }
+        for i in range(count)
+    ]
+
+
+def build_dicts(entries, source='bench'):
+    """Il ciclo precedente: dict con sei chiavi, get ripetuti, data in ISO"""
+    articles = []
+    for entry in entries:
+        try:
+            if entry.get('published_parsed') is not None:
+                article_time = datetime(*entry['published_parsed'][:6])
+            else:
+                article_time = datetime.now()
+        except Exception:
+            article_time = datetime.now()
+        articles.append({
+            'source': source,
+            'title': entry.get('title', ''),
+            'description': entry.get('summary', ''),
+            'link': entry.get('link', ''),
+            'published': article_time.isoformat(),
+            'tension_score': len(entry.get('title', '') + ' ' + entry.get('summary', '')) * 0.0
+        })
+    return articles
+
+
+def build_records(entries, source='bench'):
+    """Il ciclo attuale: un Article per voce, ogni campo letto una volta"""
+    articles = []
+    now = datetime.now()
+    for entry in entries:
+        parsed = entry.get('published_parsed')
+        try:
+            article_time = datetime(*parsed[:6]) if parsed else now
+        except (TypeError, ValueError):
+            article_time = now
+        title = entry.get('title', '')
+        summary = entry.get('summary', '')
+        articles.append(Article(source, title, summary, entry.get('link', ''), article_time,
+                                len(title + ' ' + summary) * 0.0))
+    return articles
+
+
+def dicts_to_frame(articles):
+    df = pd.DataFrame(articles)
+    df['published'] = pd.to_datetime(df['published'], format='ISO8601')
+    return df
+
+
+def dicts_to_table(articles):
+    table = pa.Table.from_pylist(articles)
+    return table.set_column(table.schema.get_field_index('published'), 'published',
+                            table['published'].cast(pa.timestamp('us')))
+
+
+def measure(func, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def memory(func, entries):
+    """Memoria allocata e mantenuta dai record costruiti (MB)"""
+    gc.collect()
+    tracemalloc.start()
+    articles = func(entries)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del articles
+    return current / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark record degli articoli')
+    parser.add_argument('--entries', type=int, default=1_000_000)
+    parser.add_argument('--output', default=None, help='File JSON dei risultati')
+    args = parser.parse_args()
+
+    entries = feed_entries(args.entries)
+    print(f"{len(entries)} feed entries\n")
+
+    results = {}
+    for name, build, to_frame, to_table in (
+            ('dict', build_dicts, dicts_to_frame, dicts_to_table),
+            ('Article', build_records, articles_to_frame, articles_to_table)):
+        articles, build_seconds = measure(build, entries)
+        frame, frame_seconds = measure(to_frame, articles)
+        table, table_seconds = measure(to_table, articles)
+        del articles, frame, table
+        megabytes = memory(build, entries)
+        results[name] = {
+            'build_seconds': round(build_seconds, 3),
+            'entries_per_second': round(len(entries) / build_seconds, 1),
+            'memory_mb': round(megabytes, 1),
+            'to_frame_seconds': round(frame_seconds, 3),
+            'to_arrow_seconds': round(table_seconds, 3)
+        }
+
+    print(f"{'record':<8} {'build':>9} {'entries/s':>11} {'memory':>10} {'-> frame':>10} {'-> arrow':>10}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['build_seconds']:>8.2f}s {result['entries_per_second']:>11.0f} "
+              f"{result['memory_mb']:>8.1f}MB {result['to_frame_seconds']:>9.2f}s {result['to_arrow_seconds']:>9.2f}s")
+    before, after = results['dict'], results['Article']
+    print(f"\nArticle vs dict: build {before['build_seconds'] / after['build_seconds']:.2f}x faster, "
+          f"memory {after['memory_mb'] / before['memory_mb']:.0%} of dicts")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'article_records', 'entries': len(entries), 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Confronta il punteggio a colonne (score_batch) con l'analisi riga per riga
+(analyze_text in un apply) e con la versione precedente, un str.contains
+per parola chiave, e verifica che i risultati coincidano.
+Uso: python benchmarks/bench_batch_scoring.py [--articles 50000] [--word-boundary] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors'))
+sys.path.append(os.path.dirname(__file__))
+
+from data_processor import DataProcessor
+from synthetic import generate_articles
+
+
+def rowwise_scores(processor, df):
+    """countries e punteggio con analyze_text su ogni riga"""
+    results = df.apply(lambda row: processor.analyze_text(row['title'] + ' ' + row['description']), axis=1)
+    return [(sorted(countries), score) for countries, score in results]
+
+
+def contains_scores(processor, df):
+    """Versione precedente di score_batch: un str.contains per parola chiave"""
+    text = (df['title'] + ' ' + df['description']).str.lower()
+    arrow = getattr(text.dtype, 'storage', None) == 'pyarrow'
+    before, after = (r'(?:^|[^\pL\pN_])', r'(?:$|[^\pL\pN_])') if arrow else (r'\b', r'\b')
+
+    def contains(term):
+        if processor.word_boundary:
+            return text.str.contains(before + re.escape(term) + after, regex=True).to_numpy()
+        return text.str.contains(term, regex=False).to_numpy()
+
+    countries = list(processor.country_keywords)
+    country_masks = np.column_stack([
+        np.logical_or.reduce([contains(keyword) for keyword in keywords])
+        for keywords in processor.country_keywords.values()
+    ])
+    score = np.zeros(len(df))
+    for keyword, weight in processor.severity_weights.items():
+        score += weight * contains(keyword)
+    for combo in processor.critical_combinations:
+        score += 2.0 * np.logical_and.reduce([contains(word) for word in combo])
+    score = np.minimum(10.0, np.round(score, 2))
+    return [(sorted(country for country, found in zip(countries, row) if found), value)
+            for row, value in zip(country_masks, score)]
+
+
+def batch_scores(processor, df):
+    batch = processor.score_batch(df['title'], df['description'])
+    return [(sorted(countries), score) for countries, score in
+            zip(batch['countries'], batch['enhanced_tension_score'])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark punteggio a colonne')
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--keyword-density', type=float, default=0.2)
+    parser.add_argument('--word-boundary', action='store_true', help='Solo parole intere')
+    parser.add_argument('--output', default=None, help='File JSON dei risultati')
+    args = parser.parse_args()
+
+    df = pd.DataFrame(generate_articles(args.articles, keyword_density=args.keyword_density))
+    processor = DataProcessor(word_boundary=args.word_boundary)
+    print(f"{len(df)} articles, word_boundary={args.word_boundary}\n")
+
+    results, reference, baseline = [], None, None
+    for name, scorer in [('rowwise', rowwise_scores), ('contains', contains_scores), ('batch', batch_scores)]:
+        start = time.perf_counter()
+        scores = scorer(processor, df)
+        seconds = time.perf_counter() - start
+
+        if reference is None:
+            reference, baseline = scores, seconds
+        mismatches = sum(1 for row, expected in zip(scores, reference) if row != expected)
+        results.append({
+            'method': name,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(len(df) / seconds, 1),
+            'speedup_vs_rowwise': round(baseline / seconds, 2),
+            'mismatches': mismatches
+        })
+        print(f"{name:<9} {seconds:>7.2f}s  {len(df) / seconds:>10.0f} rows/s  "
+              f"{baseline / seconds:.2f}x vs rowwise  {'OK' if not mismatches else f'{mismatches} MISMATCHES'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'batch_scoring', 'articles': len(df),
+                       'word_boundary': args.word_boundary, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if any(result['mismatches'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
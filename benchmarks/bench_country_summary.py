@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Misura create_country_summary da 10k a 5M articoli e lo confronta con la
+vecchia espansione basata su iterrows (solo fino a --legacy-max articoli).
+Uso: python benchmarks/bench_country_summary.py [--sizes 10000 100000 1000000 5000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors'))
+
+from data_processor import DataProcessor
+
+
+def synthetic_articles(n: int, countries, seed: int = 0) -> pd.DataFrame:
+    """Articoli già processati con 0-3 paesi ciascuno"""
+    rng = np.random.default_rng(seed)
+    names = np.array(countries, dtype=object)
+    counts = rng.integers(0, 4, size=n)
+    return pd.DataFrame({
+        'countries': [list(rng.choice(names, size=k, replace=False)) for k in counts],
+        'enhanced_tension_score': rng.integers(0, 21, size=n) / 2,
+        'published': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 86400 * 90, size=n), unit='s'),
+    })
+
+
+def legacy_country_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementazione precedente, per confronto"""
+    country_rows = []
+    for _, row in df.iterrows():
+        for country in row['countries']:
+            country_row = row.copy()
+            country_row['country'] = country
+            country_rows.append(country_row)
+    
+    country_df = pd.DataFrame(country_rows)
+    country_summary = country_df.groupby('country').agg({
+        'enhanced_tension_score': ['mean', 'max', 'count'],
+        'published': 'max'
+    }).round(2)
+    country_summary.columns = ['avg_tension', 'max_tension', 'article_count', 'last_update']
+    country_summary = country_summary.reset_index()
+    return country_summary.sort_values('avg_tension', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark create_country_summary')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--legacy-max', type=int, default=100_000)
+    args = parser.parse_args()
+    
+    processor = DataProcessor()
+    print(f"{'articles':>10} {'columnar':>10} {'iterrows':>10}")
+    
+    for n in args.sizes:
+        df = synthetic_articles(n, list(processor.country_keywords))
+        
+        start = time.perf_counter()
+        summary = processor.create_country_summary(df)
+        columnar = time.perf_counter() - start
+        
+        legacy = '-'
+        if n <= args.legacy_max:
+            start = time.perf_counter()
+            expected = legacy_country_summary(df)
+            legacy = f"{time.perf_counter() - start:.2f}s"
+            pd.testing.assert_frame_equal(
+                summary.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False
+            )
+        
+        print(f"{n:>10} {columnar:>9.2f}s {legacy:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Confronta feedparser con il parser lxml in streaming (fast_feed) sugli
+stessi feed: voci al secondo, MB al secondo e concordanza di titolo, link
+e data. I feed sono file .xml salvati (--feeds-dir, es. scaricati con curl)
+oppure feed RSS sintetici.
+Uso: python benchmarks/bench_feed_parsing.py [--feeds-dir captured/] [--per-feed 200] [--hours-back 24]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import feedparser
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors'))
+sys.path.append(os.path.dirname(__file__))
+
+import fast_feed
+from synthetic import feeds_by_source, generate_articles
+
+
+def load_feeds(args):
+    if args.feeds_dir:
+        feeds = {}
+        for path in sorted(glob.glob(os.path.join(args.feeds_dir, '*.xml'))):
+            with open(path, 'rb') as f:
+                feeds[os.path.basename(path)] = f.read()
+        return feeds
+    articles = generate_articles(args.per_feed * args.sources, sources=args.sources, days=args.days)
+    return {path: xml.encode('utf-8') for path, xml in feeds_by_source(articles, per_feed=args.per_feed).items()}
+
+
+def fields(entry):
+    published = entry.get('published_parsed') or entry.get('updated_parsed')
+    return entry.get('title', ''), entry.get('link', ''), tuple(published[:6]) if published else None
+
+
+def run(parse, feeds, repeat):
+    """Secondi per `repeat` letture di tutti i feed e voci lette in una lettura"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        entries = sum(len(parse(content).entries) for content in feeds.values())
+    return time.perf_counter() - start, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing dei feed')
+    parser.add_argument('--feeds-dir', default=None, help='Directory con feed salvati (*.xml)')
+    parser.add_argument('--sources', type=int, default=6)
+    parser.add_argument('--per-feed', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--hours-back', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help='File JSON dei risultati')
+    args = parser.parse_args()
+
+    if not fast_feed.available():
+        print("lxml not installed: nothing to compare")
+        sys.exit(1)
+
+    feeds = load_feeds(args)
+    megabytes = sum(len(content) for content in feeds.values()) / 2 ** 20
+    cutoff_time = datetime.now() - timedelta(hours=args.hours_back)
+    print(f"{len(feeds)} feeds, {megabytes:.2f} MB, cutoff {args.hours_back}h\n")
+
+    # Concordanza con feedparser sulle voci lette (senza limite di data)
+    mismatches, fallbacks = 0, 0
+    for content in feeds.values():
+        fast = fast_feed.parse_feed(content)
+        if fast is None:
+            fallbacks += 1
+            continue
+        reference = [fields(entry) for entry in feedparser.parse(content).entries]
+        mismatches += sum(a != b for a, b in zip(reference, (fields(entry) for entry in fast.entries)))
+        mismatches += abs(len(reference) - len(fast.entries))
+
+    parsers = {
+        'feedparser': lambda content: feedparser.parse(content),
+        'lxml': lambda content: fast_feed.parse_feed(content) or feedparser.parse(content),
+        'lxml+cutoff': lambda content: fast_feed.parse_feed(content, cutoff_time) or feedparser.parse(content)
+    }
+    results = {}
+    for name, parse in parsers.items():
+        seconds, entries = run(parse, feeds, args.repeat)
+        results[name] = {
+            'seconds': round(seconds / args.repeat, 4),
+            'entries': entries,
+            'entries_per_second': round(entries * args.repeat / seconds, 1),
+            'mb_per_second': round(megabytes * args.repeat / seconds, 2)
+        }
+
+    baseline = results['feedparser']['seconds']
+    print(f"{'parser':<12} {'seconds':>9} {'entries':>8} {'entries/s':>11} {'MB/s':>8} {'speedup':>8}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['seconds']:>8.3f}s {result['entries']:>8} {result['entries_per_second']:>11.0f} "
+              f"{result['mb_per_second']:>8.2f} {baseline / result['seconds']:>7.1f}x")
+    print(f"\nEntries differing from feedparser (title, link, date): {mismatches}; feeds falling back: {fallbacks}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'feed_parsing', 'feeds': len(feeds), 'megabytes': round(megabytes, 3),
+                       'mismatches': mismatches, 'fallbacks': fallbacks, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
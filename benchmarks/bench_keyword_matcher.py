@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Confronta il KeywordMatcher con le scansioni `in` separate del codice
+originale e con un'unica regex a più rami con lookahead, nel punteggio del
+collector e nell'analisi del testo del processore, e verifica che i
+risultati coincidano.
+Uso: python benchmarks/bench_keyword_matcher.py [--articles 50000] [--word-boundary]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors'))
+sys.path.append(os.path.dirname(__file__))
+
+from data_processor import DataProcessor
+from news_collector import NewsCollector
+from synthetic import generate_articles
+
+
+def scan_collector_score(collector, text):
+    """_calculate_tension_score con una scansione per parola chiave"""
+    text_lower = text.lower()
+    tension_score = sum(1 for keyword in collector.tension_keywords if keyword in text_lower)
+    region_score = sum(2 for region in collector.regions if region in text_lower)
+    return round(min(10, (tension_score + region_score) / 2), 2)
+
+
+def scan_analyze_text(processor, text):
+    """identify_countries + enhanced_tension_score con una scansione per parola chiave"""
+    text_lower = text.lower()
+    countries = [
+        country for country, keywords in processor.country_keywords.items()
+        if any(keyword in text_lower for keyword in keywords)
+    ]
+    score = sum(weight for keyword, weight in processor.severity_weights.items() if keyword in text_lower)
+    score += sum(2.0 for combo in processor.critical_combinations if all(word in text_lower for word in combo))
+    return countries, min(10.0, round(score, 2))
+
+
+def lookahead_find(terms, text):
+    """Tutte le parole chiave con una regex (?=(a|b|...)) e i prefissi impliciti"""
+    pattern, implied = terms
+    hits = set(pattern.findall(text.lower()))
+    for term in list(hits):
+        hits.update(implied[term])
+    return hits
+
+
+def lookahead_terms(terms, word_boundary):
+    terms = list(dict.fromkeys(term.lower() for term in terms))
+    ordered = sorted(terms, key=len, reverse=True)
+    alternation = '|'.join(re.escape(term) for term in ordered)
+    pattern = re.compile(rf'(?=\b({alternation})\b)' if word_boundary else f'(?=({alternation}))')
+    implied = {term: [other for other in terms if other != term and term.startswith(other)] for term in terms}
+    return pattern, implied
+
+
+def best_of(repeat, function, texts):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [function(text) for text in texts]
+        times.append(time.perf_counter() - start)
+    return min(times), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark KeywordMatcher')
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--keyword-density', type=float, default=0.2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--word-boundary', action='store_true',
+                        help='Solo parole intere (il riferimento `in` non ha questa modalità)')
+    parser.add_argument('--output', default=None, help='File JSON dei risultati')
+    args = parser.parse_args()
+
+    articles = generate_articles(args.articles, keyword_density=args.keyword_density)
+    texts = [article['title'] + ' ' + article['description'] for article in articles]
+    collector = NewsCollector(cache_path=None, dedup_path=None, poll_state_path=None,
+                              word_boundary=args.word_boundary)
+    processor = DataProcessor(word_boundary=args.word_boundary)
+
+    collector_terms = lookahead_terms(collector.tension_keywords + collector.regions, args.word_boundary)
+    processor_terms = lookahead_terms(list(processor._matcher().terms), args.word_boundary)
+    cases = {
+        'collector_score': (
+            lambda text: scan_collector_score(collector, text),
+            lambda text: round(min(10, sum(collector.keyword_points.get(hit, 0)
+                                           for hit in lookahead_find(collector_terms, text)) / 2), 2),
+            collector._calculate_tension_score
+        ),
+        'analyze_text': (
+            lambda text: scan_analyze_text(processor, text),
+            lambda text: (lambda hits: (processor._countries_from_hits(hits), processor._score_from_hits(hits)))(
+                lookahead_find(processor_terms, text)),
+            processor.analyze_text
+        )
+    }
+    results = {}
+    mismatches = 0
+    print(f"{len(texts)} texts, word_boundary={args.word_boundary}\n")
+    print(f"{'case':<16} {'scans':>8} {'regex':>8} {'matcher':>8} {'vs scans':>9} {'vs regex':>9}")
+    for name, (scan, regex, matcher) in cases.items():
+        scan_seconds, expected = best_of(args.repeat, scan, texts)
+        regex_seconds, _ = best_of(args.repeat, regex, texts)
+        matcher_seconds, actual = best_of(args.repeat, matcher, texts)
+        if name == 'analyze_text':
+            expected = [(sorted(countries), score) for countries, score in expected]
+            actual = [(sorted(countries), score) for countries, score in actual]
+        if not args.word_boundary:
+            mismatches += sum(a != b for a, b in zip(expected, actual))
+        results[name] = {'scan_seconds': round(scan_seconds, 4), 'regex_seconds': round(regex_seconds, 4),
+                         'matcher_seconds': round(matcher_seconds, 4)}
+        print(f"{name:<16} {scan_seconds:>7.2f}s {regex_seconds:>7.2f}s {matcher_seconds:>7.2f}s "
+              f"{scan_seconds / matcher_seconds:>8.1f}x {regex_seconds / matcher_seconds:>8.1f}x")
+
+    if not args.word_boundary:
+        print(f"\nResults differing from the scans: {mismatches}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'keyword_matcher', 'articles': len(texts), 'word_boundary': args.word_boundary,
+                       'mismatches': mismatches, 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
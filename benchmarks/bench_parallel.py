@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Misura il punteggio (score_batch) con 1..N processi e verifica che il
+risultato coincida con quello seriale.
+Uso: python benchmarks/bench_parallel.py [--articles 500000] [--workers 1 2 4 8] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors'))
+sys.path.append(os.path.dirname(__file__))
+
+from data_processor import DataProcessor
+from synthetic import generate_articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark punteggio multi-processo')
+    parser.add_argument('--articles', type=int, default=500000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--keyword-density', type=float, default=0.2)
+    parser.add_argument('--output', default=None, help='File JSON dei risultati')
+    args = parser.parse_args()
+
+    df = pd.DataFrame(generate_articles(args.articles, keyword_density=args.keyword_density))
+    print(f"{len(df)} articles, {os.cpu_count()} CPUs\n")
+
+    results, serial, baseline = [], None, None
+    for workers in args.workers:
+        processor = DataProcessor(workers=workers)
+        processor.parallel_min_rows = 0
+        # Avvio del pool fuori dalla misura
+        if workers > 1:
+            processor.score_batch(df['title'].head(workers * 2), df['description'].head(workers * 2))
+
+        start = time.perf_counter()
+        scores = processor.score_batch(df['title'], df['description'])
+        seconds = time.perf_counter() - start
+        processor.close()
+
+        if serial is None:
+            serial, baseline = scores, seconds
+        matches = scores.equals(serial)
+        speedup = baseline / seconds
+        results.append({
+            'workers': workers,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(len(df) / seconds, 1),
+            'speedup': round(speedup, 2),
+            'efficiency': round(speedup / workers, 2),
+            'matches_serial': matches
+        })
+        print(f"{workers:>2} workers: {seconds:>7.2f}s  {len(df) / seconds:>10.0f} rows/s  "
+              f"speedup {speedup:.2f}x  {'OK' if matches else 'MISMATCH'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'parallel_scoring', 'articles': len(df),
+                       'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if not all(result['matches_serial'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
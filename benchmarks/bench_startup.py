@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Misura l'avvio a freddo dei punti d'ingresso con `python -X importtime`.
+Fallisce (exit 1) se un comando supera il budget o carica moduli pesanti che non usa.
+Uso: python benchmarks/bench_startup.py [--repeat 3] [--budget 1.0]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUN_PY = os.path.join(ROOT, 'src', 'collectors', 'src', 'processors', 'dashboard', '.github', 'workflows', 'run.py')
+COLLECTORS = os.path.join(ROOT, 'src', 'collectors')
+PROCESSORS = os.path.join(COLLECTORS, 'src', 'processors')
+
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'plotly', 'streamlit']
+
+# (nome, argomenti dell'interprete, moduli pesanti vietati)
+COMMANDS = [
+    ('run.py --help', [RUN_PY, '--help'], HEAVY),
+    ('run.py setup', [RUN_PY, 'setup'], HEAVY),
+    ('run.py <azione non valida>', [RUN_PY, 'invalid'], HEAVY),
+    ('import news_collector', ['-c', 'import news_collector'], HEAVY),
+    ('import data_processor', ['-c', 'import data_processor'], ['plotly', 'streamlit']),
+]
+
+
+def parse_importtime(stderr):
+    """Righe di -X importtime -> {modulo: (self us, cumulativo us)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(args, cwd):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([COLLECTORS, PROCESSORS]))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    return wall, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark avvio a freddo')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=1.0, help='Secondi massimi per comando')
+    parser.add_argument('--top', type=int, default=5, help='Import più lenti da mostrare')
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, command, forbidden in COMMANDS:
+            # Il migliore di più esecuzioni: la prima paga la cache del filesystem
+            runs = [measure(command, tmp) for _ in range(args.repeat)]
+            wall, modules = min(runs, key=lambda run: run[0])
+            imports = sum(self_us for self_us, _ in modules.values()) / 1e6
+
+            print(f"\n{name}: {wall:.3f}s wall, {imports:.3f}s import, {len(modules)} modules")
+            top_level = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+            for module, (_, cumulative_us) in top_level:
+                print(f"  {cumulative_us / 1e3:>8.1f} ms  {module}")
+
+            loaded = sorted(module for module in forbidden if module in modules)
+            if loaded:
+                failures.append(f"{name}: imports {', '.join(loaded)}")
+            if wall > args.budget:
+                failures.append(f"{name}: {wall:.3f}s > budget {args.budget:.3f}s")
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("\n✅ All entry points within budget")
+
+
+if __name__ == "__main__":
+    main()
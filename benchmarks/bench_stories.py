@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Misura il raggruppamento per notizia (MinHash + LSH) su articoli sintetici,
+in cui una parte delle notizie viene ripresa da più fonti con piccole varianti.
+Uso: python benchmarks/bench_stories.py [--sizes 10000 100000 300000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors'))
+
+from story_clustering import lsh_clusters, minhash_signatures
+
+
+def synthetic_texts(stories: int, seed: int = 0):
+    """Testi di `stories` notizie; il 30% ripubblicato con una parola cambiata"""
+    rng = random.Random(seed)
+    vocabulary = [f'w{i}' for i in range(5000)]
+    texts = []
+    for _ in range(stories):
+        words = [rng.choice(vocabulary) for _ in range(30)]
+        texts.append(' '.join(words))
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] = 'changed'
+            texts.append(' '.join(words))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark raggruppamento per notizia')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+    args = parser.parse_args()
+    
+    print(f"{'stories':>10} {'articles':>10} {'minhash':>9} {'lsh':>9} {'found':>10}")
+    for stories in args.sizes:
+        texts = synthetic_texts(stories)
+        
+        start = time.perf_counter()
+        signatures = minhash_signatures(texts)
+        minhash = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        labels = lsh_clusters(signatures)
+        lsh = time.perf_counter() - start
+        
+        print(f"{stories:>10} {len(texts):>10} {minhash:>8.2f}s {lsh:>8.2f}s {labels.max() + 1:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Misura ogni fase della pipeline su dati sintetici, senza rete: raccolta e
+parsing da feed locali, caricamento dell'archivio news_*.json, punteggio,
+riconoscimento dei paesi, riepiloghi, salvataggio/lettura e report.
+I risultati vengono scritti in JSON per confrontare esecuzioni diverse.
+Uso: python benchmarks/bench_suite.py [--articles 50000] [--sources 6]
+                                      [--keyword-density 0.2] [--output results.json]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUN_PY = os.path.join(ROOT, 'src', 'collectors', 'src', 'processors', 'dashboard', '.github', 'workflows', 'run.py')
+
+sys.path.append(os.path.join(ROOT, 'src', 'collectors'))
+sys.path.append(os.path.join(ROOT, 'src', 'collectors', 'src', 'processors'))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+import pandas as pd
+
+from data_processor import DataProcessor
+from feed_server import FeedServer
+from news_collector import NewsCollector
+from synthetic import feeds_by_source, generate_articles, write_raw_archive
+
+
+class StageTimer:
+    """Raccoglie durata e righe elaborate di ogni fase"""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: int):
+        start = time.perf_counter()
+        yield
+        self.record(name, time.perf_counter() - start, rows)
+
+    def record(self, name: str, seconds: float, rows: int):
+        self.stages.append({
+            'stage': name,
+            'seconds': round(seconds, 4),
+            'rows': rows,
+            'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None
+        })
+        print(f"{name:<24} {seconds:>8.3f}s  {rows:>9} rows", flush=True)
+
+
+def load_run_module():
+    """run.py non è un pacchetto importabile: lo carichiamo dal percorso"""
+    spec = importlib.util.spec_from_file_location('run', RUN_PY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark delle fasi della pipeline')
+    parser.add_argument('--articles', type=int, default=50000, help='Articoli nell\'archivio grezzo')
+    parser.add_argument('--sources', type=int, default=6)
+    parser.add_argument('--source-weights', type=float, nargs='+', default=None,
+                        help='Peso di ogni fonte (default: uniforme)')
+    parser.add_argument('--keyword-density', type=float, default=0.2,
+                        help='Probabilità che una parola sia una parola chiave')
+    parser.add_argument('--files', type=int, default=8, help='File news_*.json in cui dividere l\'archivio')
+    parser.add_argument('--per-feed', type=int, default=100, help='Voci in ogni feed RSS locale')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='File JSON dei risultati (default: stdout)')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    cwd = os.getcwd()
+    timer = StageTimer()
+    articles = generate_articles(args.articles, sources=args.sources, keyword_density=args.keyword_density,
+                                 seed=args.seed, source_weights=args.source_weights)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs('logs')
+        run = load_run_module()
+        processor = DataProcessor()
+
+        # Raccolta da feed locali: download, parsing feedparser e punteggio del collector
+        feeds = feeds_by_source(articles, per_feed=args.per_feed)
+        with FeedServer({path: (xml, 0) for path, xml in feeds.items()}) as server:
+            collector = NewsCollector(cache_path=None, dedup_path=None, poll_state_path=None)
+            collector.rss_feeds = {path.strip('/')[:-4]: server.url(path) for path in feeds}
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                collected = collector.collect_news(hours_back=24 * 365, concurrent=True)
+                collect_seconds = time.perf_counter() - start
+        entries = sum(stats['entries'] for stats in collector.fetch_stats.values())
+        timer.record('collect', collect_seconds, len(collected))
+        timer.record('parse', sum(stats['parse_seconds'] for stats in collector.fetch_stats.values()), entries)
+
+        files = write_raw_archive(articles, os.path.join('data', 'raw'), files=args.files)
+        with timer.stage('load_raw', len(articles)):
+            df = processor.load_latest_data(files)
+
+        texts = (df['title'] + ' ' + df['description']).tolist()
+        with timer.stage('identify_countries', len(texts)):
+            for text in texts:
+                processor.identify_countries(text)
+
+        with timer.stage('score', len(df)):
+            df = processor.process_articles(df)
+
+        with timer.stage('create_country_summary', len(df)):
+            country_summary = processor.create_country_summary(df)
+
+        with timer.stage('create_timeline', len(df)):
+            timeline = processor.create_timeline(df)
+
+        with timer.stage('save', len(df)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                processor.save_processed_data(df, country_summary, timeline)
+
+        with timer.stage('load_processed', len(df)):
+            processor.load_processed_articles()
+
+        with timer.stage('report', len(df)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                run.generate_report()
+
+        os.chdir(cwd)
+
+    results = {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': vars(args),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'stages': timer.stages
+    }
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
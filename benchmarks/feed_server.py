@@ -0,0 +1,124 @@
+"""
+Server HTTP locale che simula i feed RSS per test e benchmark offline.
+
+Ogni percorso serve un feed RSS predefinito con un ritardo configurabile
+(e, come terzo elemento facoltativo, una pausa tra un KB e l'altro del corpo).
+Le risposte includono un ETag e rispondono 304 alle richieste condizionali:
+
+    server = FeedServer({'/slow.xml': (rss_xml, 2.0), '/fast.xml': (rss_xml, 0.1)})
+    server.start()
+    url = server.url('/slow.xml')
+    ...
+    server.stop()
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+
+def make_rss(items: List[Dict], title: str = 'Test Feed') -> str:
+    """Crea un documento RSS 2.0 da una lista di dict (title, description, link, published)"""
+    entries = []
+    for item in items:
+        published = item.get('published', datetime.utcnow())
+        entries.append(
+            '<item>'
+            f"<title>{escape(item.get('title', ''))}</title>"
+            f"<description>{escape(item.get('description', ''))}</description>"
+            f"<link>{escape(item.get('link', ''))}</link>"
+            f"<pubDate>{format_datetime(published)}</pubDate>"
+            '</item>'
+        )
+    
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel>'
+        f'<title>{escape(title)}</title><link>http://localhost/</link><description>{escape(title)}</description>'
+        + ''.join(entries) +
+        '</channel></rss>'
+    )
+
+
+def sample_items(count: int = 20, prefix: str = 'Story') -> List[Dict]:
+    """Genera voci di esempio distribuite nelle ultime ore"""
+    now = datetime.utcnow()
+    return [
+        {
+            'title': f'{prefix} {i}: military tension rises near the Ukraine border',
+            'description': f'Diplomacy efforts continue as sanctions on Russia are discussed ({i}).',
+            'link': f'http://localhost/{prefix.lower()}/{i}',
+            'published': now - timedelta(minutes=15 * i),
+        }
+        for i in range(count)
+    ]
+
+
+class FeedServer:
+    """Server RSS in un thread separato, con un ritardo per ogni percorso"""
+    
+    def __init__(self, feeds: Dict[str, Tuple[str, float]], host: str = '127.0.0.1', port: int = 0):
+        self.feeds = feeds
+        self.requests = {}
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                if self.path not in server.feeds:
+                    self.send_error(404)
+                    return
+                
+                body, delay, *trickle = server.feeds[self.path]
+                time.sleep(delay)
+                payload = body.encode('utf-8')
+                etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if not trickle:
+                    self.wfile.write(payload)
+                    return
+                for offset in range(0, len(payload), 1024):
+                    self.wfile.write(payload[offset:offset + 1024])
+                    self.wfile.flush()
+                    time.sleep(trickle[0])
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+    
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}{path}'
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
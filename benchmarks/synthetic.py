@@ -0,0 +1,112 @@
+"""
+Generatori di dati sintetici per i benchmark: articoli grezzi, archivi
+news_*.json e feed RSS, con dimensione, mix di fonti e densità di parole
+chiave configurabili.
+
+    articles = generate_articles(100_000, sources=6, keyword_density=0.3)
+    files = write_raw_archive(articles, 'data/raw', files=4)
+    feeds = feeds_by_source(articles, per_feed=50)
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from feed_server import make_rss
+
+FILLER = (
+    'officials said on report statement meeting week government leaders talks '
+    'city people economy market energy region local news update plans group '
+    'minister weather festival sport season trade summit visit agreement'
+).split()
+
+TENSION = [
+    'war', 'invasion', 'attack', 'military', 'conflict', 'sanctions', 'threat',
+    'crisis', 'tension', 'dispute', 'protest', 'diplomatic', 'nuclear', 'missile',
+    'terror', 'violence', 'strike', 'border'
+]
+
+PLACES = [
+    'russia', 'moscow', 'ukraine', 'kyiv', 'china', 'beijing', 'taiwan', 'iran',
+    'tehran', 'israel', 'gaza', 'north korea', 'pyongyang', 'syria', 'damascus',
+    'afghanistan', 'kabul', 'washington', 'american'
+]
+
+
+def _sentences(rng: np.random.Generator, n: int, words: int, keyword_density: float) -> List[str]:
+    """n frasi di `words` parole; ogni parola è una parola chiave con probabilità keyword_density"""
+    filler = rng.choice(np.array(FILLER, dtype=object), size=(n, words))
+    is_keyword = rng.random((n, words)) < keyword_density
+    is_place = rng.random((n, words)) < 0.4
+    tension = rng.choice(np.array(TENSION, dtype=object), size=(n, words))
+    places = rng.choice(np.array(PLACES, dtype=object), size=(n, words))
+    tokens = np.where(is_keyword, np.where(is_place, places, tension), filler)
+    return [' '.join(row) for row in tokens]
+
+
+def generate_articles(count: int, sources: int = 6, keyword_density: float = 0.2,
+                      days: int = 7, seed: int = 0, end: Optional[datetime] = None,
+                      source_weights: Optional[List[float]] = None) -> List[Dict]:
+    """Articoli grezzi nello stesso formato di NewsCollector
+
+    Le fonti si chiamano source_0..source_{n-1}; source_weights (facoltativo)
+    ne regola il mix, altrimenti è uniforme. Le date sono distribuite negli
+    ultimi `days` giorni prima di end.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now()
+    names = np.array([f'source_{i}' for i in range(sources)], dtype=object)
+    weights = None
+    if source_weights is not None:
+        weights = np.asarray(source_weights, dtype=float)
+        weights = weights / weights.sum()
+
+    chosen = rng.choice(names, size=count, p=weights)
+    offsets = rng.integers(0, days * 86400, size=count)
+    titles = _sentences(rng, count, 8, keyword_density)
+    descriptions = _sentences(rng, count, 24, keyword_density)
+    scores = np.round(rng.random(count) * 10, 2)
+
+    return [
+        {
+            'source': source,
+            'title': f'{title} ({i})',
+            'description': description,
+            'link': f'http://localhost/{source}/{i}',
+            'published': (end - timedelta(seconds=int(offset))).isoformat(),
+            'tension_score': float(score)
+        }
+        for i, (source, title, description, offset, score)
+        in enumerate(zip(chosen, titles, descriptions, offsets, scores))
+    ]
+
+
+def write_raw_archive(articles: List[Dict], directory: str, files: int = 1) -> List[str]:
+    """Divide gli articoli in `files` file news_*.json come le vecchie esecuzioni del collector"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, chunk in enumerate(np.array_split(np.arange(len(articles)), max(1, files))):
+        path = os.path.join(directory, f'news_20240101_{i:06d}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([articles[j] for j in chunk], f, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def feeds_by_source(articles: List[Dict], per_feed: int = 50) -> Dict[str, str]:
+    """Un feed RSS per fonte con i per_feed articoli più recenti: {'/source.xml': xml}"""
+    by_source = {}
+    for article in articles:
+        by_source.setdefault(article['source'], []).append(article)
+
+    feeds = {}
+    for source, items in sorted(by_source.items()):
+        items = sorted(items, key=lambda item: item['published'], reverse=True)[:per_feed]
+        feeds[f'/{source}.xml'] = make_rss(
+            [dict(item, published=datetime.fromisoformat(item['published'])) for item in items],
+            title=source
+        )
+    return feeds
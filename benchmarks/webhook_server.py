@@ -0,0 +1,65 @@
+"""
+Server HTTP locale che simula un webhook per test e benchmark degli avvisi.
+
+Registra ogni POST JSON ricevuto insieme all'istante di arrivo; delay
+simula un webhook lento, status un webhook che risponde con un errore:
+
+    with WebhookServer(delay=0.5) as server:
+        sink = WebhookSink(server.url())
+        ...
+        server.received  # [(datetime UTC di arrivo, payload), ...]
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookServer:
+    """Webhook in un thread separato che conserva i payload ricevuti"""
+
+    def __init__(self, delay: float = 0.0, status: int = 200, host: str = '127.0.0.1', port: int = 0):
+        self.delay = delay
+        self.status = status
+        self.received = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                arrived = datetime.now(timezone.utc).replace(tzinfo=None)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(server.delay)
+                with server.lock:
+                    server.received.append((arrived, json.loads(body or b'null')))
+                self.send_response(server.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    def url(self, path: str = '/hook') -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}{path}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,306 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+import article_store
+
+# Indice SQLite degli articoli processati: ricostruito con l'istantanea, esteso dai lotti del daemon
+ARTICLE_INDEX = 'data/processed/articles.sqlite3'
+
+_SCHEMA = [
+    'CREATE TABLE articles ('
+    'id INTEGER PRIMARY KEY, published INTEGER NOT NULL, source TEXT NOT NULL, '
+    'score REAL NOT NULL, countries_mask INTEGER NOT NULL, story_id INTEGER, '
+    'title TEXT, description TEXT, link TEXT)',
+    # Una riga per (articolo, paese): la bitmask non è indicizzabile
+    'CREATE TABLE article_countries ('
+    'country TEXT NOT NULL, published INTEGER NOT NULL, score REAL NOT NULL, article_id INTEGER NOT NULL)',
+    'CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+]
+
+# Creati dopo il caricamento: inserire in tabelle senza indici è molto più veloce
+_INDEXES = [
+    'CREATE INDEX idx_articles_published ON articles (published)',
+    'CREATE INDEX idx_articles_source ON articles (source, published)',
+    'CREATE INDEX idx_articles_score ON articles (score, published)',
+    'CREATE INDEX idx_countries ON article_countries (country, published, score)',
+    'CREATE INDEX idx_countries_published ON article_countries (published, country)',
+    'CREATE INDEX idx_articles_story ON articles (story_id)'
+]
+
+_ARTICLE_COLUMNS = ['title', 'description', 'link', 'source', 'published', 'score', 'countries_mask', 'story_id']
+
+
+def _to_micros(values) -> np.ndarray:
+    """Date -> microsecondi dall'epoca (interi, confrontabili nell'indice)"""
+    return pd.to_datetime(pd.Series(values)).astype('datetime64[us]').astype(np.int64).to_numpy()
+
+
+def _micros(value) -> Optional[int]:
+    return None if value is None else int(_to_micros([value])[0])
+
+
+def _insert(conn: sqlite3.Connection, df: pd.DataFrame, country_names: List[str], first_id: int):
+    """Inserisce gli articoli di df con id consecutivi da first_id"""
+    ids = np.arange(first_id, first_id + len(df))
+    published = _to_micros(df['published'])
+    scores = df['enhanced_tension_score'].astype(float).to_numpy()
+    masks = article_store.encode_countries(df['countries'], country_names)
+    story_ids = df['story_id'] if 'story_id' in df else pd.Series([None] * len(df))
+    story_ids = [None if pd.isna(value) else int(value) for value in story_ids]
+
+    conn.executemany(
+        'INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        zip(ids.tolist(), published.tolist(), df['source'].tolist(), scores.tolist(),
+            masks.tolist(), story_ids, df['title'].tolist(), df['description'].tolist(), df['link'].tolist())
+    )
+
+    exploded = pd.DataFrame({
+        'country': df['countries'].to_numpy(), 'published': published, 'score': scores, 'article_id': ids
+    }).explode('country').dropna(subset=['country'])
+    conn.executemany(
+        'INSERT INTO article_countries VALUES (?, ?, ?, ?)',
+        exploded.itertuples(index=False, name=None)
+    )
+
+
+class ArticleIndexWriter:
+    """Ricostruisce l'indice un lotto alla volta"""
+
+    def __init__(self, country_names: List[str], path: str = ARTICLE_INDEX):
+        self.country_names = list(country_names)
+        self.path = path
+        self.staging = path + '.tmp'
+        self.rows = 0
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.staging):
+            os.remove(self.staging)
+        self.conn = sqlite3.connect(self.staging)
+        self.conn.execute('PRAGMA journal_mode = OFF')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        for statement in _SCHEMA:
+            self.conn.execute(statement)
+        return self
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        _insert(self.conn, df, self.country_names, self.rows)
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.conn.close()
+            os.remove(self.staging)
+            return False
+        for statement in _INDEXES:
+            self.conn.execute(statement)
+        self.conn.execute('INSERT INTO meta VALUES (?, ?)', ('country_codes', json.dumps(self.country_names)))
+        self.conn.execute('ANALYZE')
+        self.conn.commit()
+        self.conn.close()
+        os.replace(self.staging, self.path)
+        return False
+
+
+def write_article_index(df: pd.DataFrame, country_names: List[str], path: str = ARTICLE_INDEX):
+    """Sostituisce l'indice con gli articoli di df"""
+    with ArticleIndexWriter(country_names, path) as writer:
+        writer.write(df)
+
+
+def append_article_index(df: pd.DataFrame, path: str = ARTICLE_INDEX):
+    """Aggiunge gli articoli di df all'indice esistente, senza ricostruirlo"""
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'country_codes'").fetchone()
+        first_id = conn.execute('SELECT COALESCE(MAX(id), -1) + 1 FROM articles').fetchone()[0]
+        _insert(conn, df, json.loads(row[0]) if row else [], first_id)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def rebuild_article_index(path: str = ARTICLE_INDEX, base_dir: str = article_store.PROCESSED_STORE) -> bool:
+    """Ricostruisce l'indice dall'istantanea Parquet; False se l'istantanea manca"""
+    if not os.path.isdir(base_dir):
+        return False
+    dataset = ds.dataset(base_dir, format='parquet', partitioning=article_store.PARTITIONING)
+    country_names = article_store.dataset_country_names(dataset)
+    if country_names is None:
+        return False
+
+    print(f"Rebuilding article index {path} from {base_dir}")
+    columns = ['title', 'description', 'link', 'source', 'published', 'enhanced_tension_score',
+               'countries_mask', 'story_id']
+    with ArticleIndexWriter(country_names, path) as writer:
+        for batch in article_store.processed_batches(columns, base_dir=base_dir):
+            df = batch.to_pandas()
+            df['countries'] = article_store.decode_countries(df.pop('countries_mask'), country_names)
+            writer.write(df)
+    return True
+
+
+class ArticleIndex:
+    """Interrogazioni per finestra temporale sugli articoli processati"""
+
+    def __init__(self, path: str = ARTICLE_INDEX, base_dir: Optional[str] = article_store.PROCESSED_STORE):
+        # L'indice non è versionato: se manca si ricostruisce dall'istantanea (base_dir)
+        if not os.path.exists(path) and not (base_dir and rebuild_article_index(path, base_dir)):
+            raise FileNotFoundError(path)
+        self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'country_codes'").fetchone()
+        self.country_names = json.loads(row[0]) if row else []
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    @staticmethod
+    def _window(column: str, start, end, conditions: List[str], params: List):
+        if start is not None:
+            conditions.append(f'{column} >= ?')
+            params.append(_micros(start))
+        if end is not None:
+            conditions.append(f'{column} < ?')
+            params.append(_micros(end))
+
+    def articles_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         country: Optional[str] = None, min_score: Optional[float] = None,
+                         sources: Optional[List[str]] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        """Articoli pubblicati in [start, end), dal più recente"""
+        conditions, params = [], []
+        if country is not None:
+            table = 'article_countries c JOIN articles a ON a.id = c.article_id'
+            conditions.append('c.country = ?')
+            params.append(country)
+            self._window('c.published', start, end, conditions, params)
+            if min_score is not None:
+                conditions.append('c.score >= ?')
+                params.append(min_score)
+            order = 'c.published'
+        else:
+            table = 'articles a'
+            self._window('a.published', start, end, conditions, params)
+            if min_score is not None:
+                conditions.append('a.score >= ?')
+                params.append(min_score)
+            order = 'a.published'
+        if sources is not None:
+            conditions.append(f"a.source IN ({', '.join('?' * len(sources))})")
+            params.extend(sources)
+
+        query = f"SELECT {', '.join('a.' + column for column in _ARTICLE_COLUMNS)} FROM {table}"
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY {order} DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+
+        return self._frame(self.conn.execute(query, params).fetchall())
+
+    def story_articles(self, story_ids: List[int]) -> pd.DataFrame:
+        """Tutti gli articoli delle notizie indicate"""
+        rows = []
+        story_ids = [int(story_id) for story_id in story_ids]
+        for start in range(0, len(story_ids), 500):
+            chunk = story_ids[start:start + 500]
+            rows.extend(self.conn.execute(
+                f"SELECT {', '.join(_ARTICLE_COLUMNS)} FROM articles "
+                f"WHERE story_id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return self._frame(rows)
+
+    def _frame(self, rows: List) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=_ARTICLE_COLUMNS)
+        df['published'] = pd.to_datetime(df['published'].astype(np.int64), unit='us')
+        df['countries'] = article_store.decode_countries(df.pop('countries_mask'), self.country_names)
+        df['story_id'] = df['story_id'].astype('Int64')
+        return df.rename(columns={'score': 'enhanced_tension_score'})
+
+    def country_summary(self, window: Optional[timedelta] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Riassunto per paese (come create_country_summary) sugli articoli dell'ultima finestra"""
+        conditions, params = [], []
+        if window is not None:
+            end = end or datetime.now()
+            self._window('published', end - window, end, conditions, params)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        rows = self.conn.execute(
+            'SELECT country, AVG(score), MAX(score), COUNT(*), MAX(published) '
+            f'FROM article_countries{where} GROUP BY country', params
+        ).fetchall()
+        if not rows:
+            return pd.DataFrame()
+
+        summary = pd.DataFrame(rows, columns=['country', 'avg_tension', 'max_tension', 'article_count', 'last_update'])
+        summary[['avg_tension', 'max_tension']] = summary[['avg_tension', 'max_tension']].round(2)
+        summary['last_update'] = pd.to_datetime(summary['last_update'], unit='us')
+        return summary.sort_values('avg_tension', ascending=False)
+
+    def timeline(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Timeline giornaliera (come create_timeline) per gli articoli in [start, end)"""
+        conditions, params = [], []
+        self._window('published', start, end, conditions, params)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        day = 'published / 86400000000'
+
+        rows = self.conn.execute(
+            f'SELECT {day} AS day, AVG(score), MAX(score), COUNT(*) FROM articles{where} GROUP BY day', params
+        ).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        mentioned = dict(self.conn.execute(
+            f'SELECT {day} AS day, COUNT(DISTINCT country) FROM article_countries{where} GROUP BY day', params
+        ).fetchall())
+
+        timeline = pd.DataFrame(rows, columns=['day', 'avg_tension', 'max_tension', 'article_count'])
+        timeline[['avg_tension', 'max_tension']] = timeline[['avg_tension', 'max_tension']].round(2)
+        timeline['countries_mentioned'] = timeline['day'].map(mentioned).fillna(0).astype(int)
+        timeline.insert(0, 'date', pd.to_datetime(timeline.pop('day'), unit='D').dt.date)
+        return timeline.sort_values('date').reset_index(drop=True)
+
+    def stats(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict:
+        """Numero di articoli, punteggio medio e massimo e data più recente nella finestra"""
+        conditions, params = [], []
+        self._window('published', start, end, conditions, params)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        count, average, peak, latest = self.conn.execute(
+            f'SELECT COUNT(*), AVG(score), MAX(score), MAX(published) FROM articles{where}', params
+        ).fetchone()
+        return {
+            'article_count': count,
+            'avg_tension': average,
+            'max_tension': peak,
+            'latest': pd.Timestamp(latest, unit='us') if latest is not None else None
+        }
+
+
+def articles_between(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     country: Optional[str] = None, min_score: Optional[float] = None,
+                     limit: Optional[int] = None, path: str = ARTICLE_INDEX) -> pd.DataFrame:
+    """Scorciatoia per ArticleIndex(path).articles_between"""
+    with ArticleIndex(path) as index:
+        return index.articles_between(start, end, country=country, min_score=min_score, limit=limit)
+
+
+def country_summary(window: Optional[timedelta] = None, path: str = ARTICLE_INDEX) -> pd.DataFrame:
+    """Scorciatoia per ArticleIndex(path).country_summary"""
+    with ArticleIndex(path) as index:
+        return index.country_summary(window)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, List, Sequence
+
+# Campi di un articolo raccolto, nell'ordine delle colonne grezze
+FIELDS = ('source', 'title', 'description', 'link', 'published', 'tension_score')
+
+
+class Article:
+    """Articolo raccolto da un feed, condiviso da collector e processore"""
+
+    __slots__ = FIELDS
+
+    def __init__(self, source: str, title: str, description: str, link: str,
+                 published: datetime, tension_score: float):
+        self.source = source
+        self.title = title
+        self.description = description
+        self.link = link
+        self.published = published
+        self.tension_score = tension_score
+
+    def __repr__(self):
+        return f'Article({self.source!r}, {self.title!r}, published={self.published.isoformat()})'
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+    def to_dict(self) -> Dict:
+        """Forma dict con published in ISO, come nei vecchi file JSON"""
+        return {
+            'source': self.source,
+            'title': self.title,
+            'description': self.description,
+            'link': self.link,
+            'published': self.published.isoformat(),
+            'tension_score': self.tension_score
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Article':
+        published = data['published']
+        if isinstance(published, str):
+            published = datetime.fromisoformat(published)
+        return cls(data['source'], data.get('title', ''), data.get('description', ''), data.get('link', ''),
+                   published, data.get('tension_score', 0.0))
+
+
+def _records(articles: Sequence) -> Sequence[Article]:
+    # Accetta anche i dict dei file JSON e del codice precedente
+    if articles and not isinstance(articles[0], Article):
+        return [Article.from_dict(article) for article in articles]
+    return articles
+
+
+def articles_to_columns(articles: Sequence) -> Dict[str, List]:
+    """Una lista per campo, in un passaggio per colonna"""
+    articles = _records(articles)
+    return {field: list(map(attrgetter(field), articles)) for field in FIELDS}
+
+
+def articles_to_table(articles: Sequence):
+    """Lista di articoli -> tabella Arrow, senza passare da pandas"""
+    import pyarrow as pa
+
+    columns = articles_to_columns(articles)
+    types = {'published': pa.timestamp('us'), 'tension_score': pa.float64()}
+    return pa.table({field: pa.array(columns[field], types.get(field, pa.string())) for field in FIELDS})
+
+
+def articles_to_frame(articles: Sequence):
+    """Lista di articoli -> DataFrame (published come datetime64)"""
+    return articles_to_table(articles).to_pandas()
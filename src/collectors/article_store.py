@@ -0,0 +1,259 @@
+import glob
+import json
+import os
+import shutil
+import uuid
+from datetime import date, datetime
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from article_record import articles_to_table
+
+# Archivio colonnare degli articoli: dataset Parquet partizionato per data e fonte
+RAW_STORE = 'data/store/raw'
+PROCESSED_STORE = 'data/processed/articles'
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('date', pa.date32()), ('source', pa.string())]),
+    flavor='hive'
+)
+
+RAW_SCHEMA = pa.schema([
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('link', pa.string()),
+    ('published', pa.timestamp('us')),
+    ('tension_score', pa.float64()),
+    ('date', pa.date32()),
+    ('source', pa.string())
+])
+
+PROCESSED_SCHEMA = pa.schema([
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('link', pa.string()),
+    ('published', pa.timestamp('us')),
+    ('tension_score', pa.float64()),
+    ('countries_mask', pa.int64()),
+    ('enhanced_tension_score', pa.float64()),
+    ('hour', pa.int32()),
+    ('day_of_week', pa.int32()),
+    ('story_id', pa.int64()),
+    ('date', pa.date32()),
+    ('source', pa.string())
+])
+
+# Chiave dei metadati Parquet con l'ordine dei paesi usato per countries_mask
+COUNTRY_CODES_KEY = b'country_codes'
+
+
+def encode_countries(countries: pd.Series, names: List[str]) -> np.ndarray:
+    """Liste di paesi -> bitmask int64 (bit i = names[i]), per l'intera colonna"""
+    bits = {name: 1 << i for i, name in enumerate(names)}
+    exploded = countries.reset_index(drop=True).explode()
+    codes = exploded.map(bits).fillna(0).astype(np.int64)
+    # I paesi di un articolo sono distinti, quindi la somma equivale all'OR
+    return codes.groupby(level=0).sum().reindex(range(len(countries)), fill_value=0).to_numpy()
+
+
+def decode_countries(masks, names: List[str]) -> List[List[str]]:
+    """Bitmask -> liste di paesi, decodificando una sola volta ogni maschera distinta"""
+    masks = np.asarray(masks, dtype=np.int64)
+    unique, inverse = np.unique(masks, return_inverse=True)
+    bits = (unique[:, None] >> np.arange(len(names))) & 1
+    name_array = np.array(names, dtype=object)
+    decoded = [list(name_array[row.astype(bool)]) for row in bits]
+    return [decoded[i] for i in inverse]
+
+
+def country_mask(names: List[str], *countries: str) -> int:
+    """Maschera con i bit dei paesi indicati, per filtrare con un AND bit a bit"""
+    return sum(1 << names.index(country) for country in countries)
+
+
+def _to_table(df: pd.DataFrame, schema: pa.Schema, country_names: Optional[List[str]] = None) -> pa.Table:
+    df = df.copy()
+    df['published'] = pd.to_datetime(df['published'])
+    df['date'] = df['published'].dt.date
+    if 'countries_mask' in schema.names:
+        df['countries_mask'] = encode_countries(df['countries'], country_names)
+        schema = schema.with_metadata({COUNTRY_CODES_KEY: json.dumps(country_names)})
+    # Colonne opzionali (es. story_id) assenti: valori nulli
+    for field in schema:
+        if field.name not in df:
+            df[field.name] = None
+    columns = [field.name for field in schema]
+    return pa.Table.from_pandas(df[columns], schema=schema, preserve_index=False)
+
+
+def write_raw_articles(articles: List, base_dir: str = RAW_STORE) -> List[str]:
+    """Aggiunge gli articoli raccolti (Article o dict) all'archivio grezzo; restituisce i file scritti"""
+    if not articles:
+        return []
+    
+    # Colonne Arrow direttamente dai record, senza DataFrame intermedio
+    table = articles_to_table(articles)
+    table = table.append_column('date', pc.cast(table['published'], pa.date32()))
+    return write_raw_table(table, base_dir)
+
+
+def write_raw_table(table: pa.Table, base_dir: str = RAW_STORE) -> List[str]:
+    """Aggiunge all'archivio grezzo una tabella con le colonne di RAW_SCHEMA; restituisce i file scritti"""
+    table = table.select(RAW_SCHEMA.names).cast(RAW_SCHEMA)
+    # uuid: due scritture nello stesso secondo non si sovrascrivono
+    run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}"
+    written = []
+    
+    ds.write_dataset(
+        table, base_dir,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=f'news_{run_id}_{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        file_visitor=lambda written_file: written.append(written_file.path)
+    )
+    return sorted(written)
+
+
+class ProcessedArticlesWriter:
+    """Scrive l'istantanea degli articoli processati un lotto alla volta"""
+
+    def __init__(self, country_names: List[str], base_dir: str = PROCESSED_STORE):
+        self.country_names = list(country_names)
+        self.base_dir = base_dir
+        self.staging = base_dir.rstrip('/') + '.tmp'
+        self.batches = 0
+
+    def __enter__(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+        os.makedirs(self.staging)
+        return self
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        ds.write_dataset(
+            _to_table(df, PROCESSED_SCHEMA, self.country_names), self.staging,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f'part-{self.batches}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        self.batches += 1
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            shutil.rmtree(self.staging, ignore_errors=True)
+            return False
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+        os.replace(self.staging, self.base_dir)
+        return False
+
+
+def write_processed_articles(df: pd.DataFrame, country_names: List[str], base_dir: str = PROCESSED_STORE):
+    """Sostituisce l'istantanea degli articoli processati"""
+    with ProcessedArticlesWriter(country_names, base_dir) as writer:
+        writer.write(df)
+
+
+def append_processed_articles(df: pd.DataFrame, country_names: List[str], base_dir: str = PROCESSED_STORE):
+    """Aggiunge articoli all'istantanea senza riscriverla"""
+    if df.empty:
+        return
+    ds.write_dataset(
+        _to_table(df, PROCESSED_SCHEMA, country_names), base_dir,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=f'append-{uuid.uuid4().hex}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+
+def processed_batches(columns: List[str], batch_size: int = 100_000,
+                      base_dir: str = PROCESSED_STORE) -> Iterator[pa.Table]:
+    """Articoli processati a lotti di tabelle Arrow"""
+    if not os.path.isdir(base_dir):
+        return
+    dataset = ds.dataset(base_dir, format='parquet', partitioning=PARTITIONING)
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield pa.Table.from_batches([batch])
+
+
+def dataset_country_names(dataset: ds.Dataset) -> Optional[List[str]]:
+    """Ordine dei paesi di countries_mask salvato nei metadati, None se assente"""
+    metadata = dataset.schema.metadata or {}
+    return json.loads(metadata[COUNTRY_CODES_KEY]) if COUNTRY_CODES_KEY in metadata else None
+
+
+def raw_dataset(files: List[str], base_dir: str = RAW_STORE) -> ds.Dataset:
+    """Dataset su un sottoinsieme di file dell'archivio grezzo"""
+    return ds.dataset(files, format='parquet', partitioning=PARTITIONING, partition_base_dir=base_dir)
+
+
+def raw_files(base_dir: str = RAW_STORE) -> List[str]:
+    """Tutti i file Parquet dell'archivio grezzo"""
+    return sorted(glob.glob(os.path.join(base_dir, '**', '*.parquet'), recursive=True))
+
+
+def read_articles(base_dir: str = PROCESSED_STORE,
+                  columns: Optional[List[str]] = None,
+                  start: Optional[datetime] = None,
+                  end: Optional[datetime] = None,
+                  sources: Optional[List[str]] = None,
+                  min_score: Optional[float] = None,
+                  country: Optional[str] = None,
+                  files: Optional[List[str]] = None) -> pd.DataFrame:
+    """Legge gli articoli leggendo solo le colonne e le partizioni necessarie"""
+    if files is not None:
+        if not files:
+            return pd.DataFrame(columns=columns)
+        dataset = raw_dataset(files, base_dir)
+    else:
+        if not os.path.isdir(base_dir):
+            return pd.DataFrame(columns=columns)
+        dataset = ds.dataset(base_dir, format='parquet', partitioning=PARTITIONING)
+
+    country_names = dataset_country_names(dataset)
+
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field('date') >= _as_date(start))
+        conditions.append(ds.field('published') >= pd.Timestamp(start).to_pydatetime())
+    if end is not None:
+        conditions.append(ds.field('date') <= _as_date(end))
+        conditions.append(ds.field('published') < pd.Timestamp(end).to_pydatetime())
+    if sources is not None:
+        conditions.append(ds.field('source').isin(list(sources)))
+    if min_score is not None:
+        conditions.append(ds.field('enhanced_tension_score') >= min_score)
+    if country is not None:
+        if country_names is None or country not in country_names:
+            return pd.DataFrame(columns=columns)
+        bit = country_mask(country_names, country)
+        conditions.append(pc.bit_wise_and(ds.field('countries_mask'), pa.scalar(bit, pa.int64())) != 0)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    decode = country_names is not None and (columns is None or 'countries' in columns)
+    read_columns = columns
+    if columns is not None and 'countries' in columns and country_names is not None:
+        read_columns = ['countries_mask' if column == 'countries' else column for column in columns]
+
+    df = dataset.to_table(columns=read_columns, filter=expression).to_pandas()
+    if decode:
+        df['countries'] = decode_countries(df['countries_mask'], country_names)
+        if columns is not None:
+            df = df[columns]
+    return df
+
+
+def _as_date(value) -> date:
+    return pd.Timestamp(value).date()
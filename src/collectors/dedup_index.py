@@ -0,0 +1,95 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+class DedupIndex:
+    """Indice persistente (SQLite) degli articoli già salvati, confermato con commit()"""
+    
+    def __init__(self, path: str = 'data/sources/dedup_index.sqlite3'):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        # Digest raccolti ma non ancora salvati: digest -> (source, first_seen)
+        self.pending = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen ('
+            'digest BLOB PRIMARY KEY, source TEXT NOT NULL, first_seen TEXT NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self.conn.commit()
+    
+    @staticmethod
+    def digest(source: str, link: str, title: str) -> bytes:
+        key = _normalize_link(link) if link else 'title:' + _normalize_text(title)
+        return hashlib.blake2b(f'{source}\x1f{key}'.encode('utf-8'), digest_size=16).digest()
+    
+    def add(self, source: str, link: str, title: str) -> bool:
+        """Registra l'articolo in attesa di commit(); False se era già presente"""
+        digest = self.digest(source, link, title)
+        with self._lock:
+            if digest in self.pending:
+                return False
+            if self.conn.execute('SELECT 1 FROM seen WHERE digest = ?', (digest,)).fetchone():
+                return False
+            self.pending[digest] = (source, datetime.now().isoformat())
+            return True
+    
+    def _take(self, sources: Optional[Iterable[str]]) -> List:
+        if sources is None:
+            taken = list(self.pending.items())
+        else:
+            sources = set(sources)
+            taken = [(digest, value) for digest, value in self.pending.items() if value[0] in sources]
+        for digest, _ in taken:
+            del self.pending[digest]
+        return taken
+    
+    def commit(self, sources: Optional[Iterable[str]] = None):
+        """Scrive i digest in attesa delle fonti indicate (tutte con None)"""
+        with self._lock:
+            taken = self._take(sources)
+            if not taken:
+                return
+            try:
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO seen (digest, source, first_seen) VALUES (?, ?, ?)',
+                    [(digest, source, first_seen) for digest, (source, first_seen) in taken]
+                )
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                self.pending.update(taken)
+                raise
+    
+    def rollback(self, sources: Optional[Iterable[str]] = None):
+        """Dimentica i digest in attesa (es. articoli non salvati): verranno raccolti di nuovo"""
+        with self._lock:
+            self._take(sources)
+    
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+    
+    def close(self):
+        self.conn.close()
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+
+def _normalize_link(link: str) -> str:
+    """Link senza frammento né parametri di tracciamento (utm_*)"""
+    parts = urlsplit(link.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith('utm_')])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
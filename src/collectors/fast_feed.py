@@ -0,0 +1,164 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+# Elementi di una voce per nome locale (RSS 2.0, RSS 1.0/RDF e Atom)
+_ENTRY_TAGS = {'item', 'entry'}
+_ROOT_TAGS = {'rss', 'RDF', 'feed'}
+_TITLE_TAGS = {'title'}
+_SUMMARY_TAGS = ('summary', 'description', 'content')
+_DATE_TAGS = ('published', 'pubDate', 'issued', 'date', 'updated', 'modified')
+
+_STRPTIME_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %z',
+    '%a, %d %b %Y %H:%M:%S GMT',
+    '%d %b %Y %H:%M:%S %z',
+    '%a, %d %b %Y %H:%M %z',
+]
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _strptime(fmt: str) -> Callable[[str], datetime]:
+    return lambda text: _utc(datetime.strptime(text, fmt))
+
+
+def _iso8601(text: str) -> datetime:
+    return _utc(datetime.fromisoformat(text.replace('Z', '+00:00')))
+
+
+def _rfc822(text: str) -> datetime:
+    # Fusi orari con nome (EST, PDT...) e altre varianti accettate da email.utils
+    return _utc(parsedate_to_datetime(text))
+
+
+class DateParser:
+    """Interpreta le date dei feed ricordando l'ultimo formato riuscito"""
+
+    def __init__(self):
+        self.parsers = [_strptime(fmt) for fmt in _STRPTIME_FORMATS] + [_iso8601, _rfc822]
+        self.last = 0
+
+    def parse(self, text: Optional[str]) -> Optional[datetime]:
+        if not text:
+            return None
+        text = text.strip()
+        try:
+            return self.parsers[self.last](text)
+        except (TypeError, ValueError):
+            pass
+        for i, parser in enumerate(self.parsers):
+            if i == self.last:
+                continue
+            try:
+                value = parser(text)
+            except (TypeError, ValueError):
+                continue
+            self.last = i
+            return value
+        return None
+
+
+class FastFeed:
+    """Risultato di parse_feed, con le voci nella forma usata da feedparser"""
+
+    def __init__(self, entries: List[Dict], stopped_early: bool = False):
+        self.entries = entries
+        # True se la lettura si è fermata alle voci più vecchie del limite
+        self.stopped_early = stopped_early
+
+
+def _etree():
+    # Importato solo quando serve, per non rallentare l'avvio del collector
+    try:
+        from lxml import etree
+    except ImportError:  # lxml non installato: si usa sempre feedparser
+        return None
+    return etree
+
+
+def available() -> bool:
+    return _etree() is not None
+
+
+def _local(tag) -> str:
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _entry(element, dates: DateParser) -> Dict:
+    """Campi di una voce: title, summary, link, published_parsed"""
+    found = {}
+    link = None
+    for child in element:
+        name = _local(child.tag)
+        if name == 'link':
+            # Atom: <link href rel="alternate"/>; RSS: testo dell'elemento
+            href = child.get('href')
+            if href is None:
+                link = link or (child.text or '').strip()
+            elif child.get('rel', 'alternate') == 'alternate' and not link:
+                link = href
+        elif name in _TITLE_TAGS or name in _SUMMARY_TAGS or name in _DATE_TAGS:
+            # Il primo elemento con quel nome vince (es. title prima di media:title)
+            found.setdefault(name, child.text or '')
+
+    entry = {
+        'title': found.get('title', '').strip(),
+        'summary': next((found[name] for name in _SUMMARY_TAGS if name in found), '').strip(),
+        'link': link or ''
+    }
+    for name in _DATE_TAGS:
+        if name in found:
+            published = dates.parse(found[name])
+            if published is not None:
+                entry['published_parsed'] = published.timetuple()[:6]
+                break
+    return entry
+
+
+def parse_feed(content: bytes, cutoff_time: Optional[datetime] = None,
+               stop_after: int = 3) -> Optional[FastFeed]:
+    """Legge un feed RSS/Atom in streaming con lxml; None se va usato feedparser"""
+    etree = _etree()
+    if etree is None:
+        return None
+
+    dates = DateParser()
+    entries = []
+    old_in_a_row = 0
+    root_checked = False
+    try:
+        events = etree.iterparse(BytesIO(content), events=('end',),
+                                 resolve_entities=False, no_network=True, huge_tree=False)
+        for _, element in events:
+            if not root_checked:
+                # La radice esiste già alla chiusura del primo elemento
+                if _local(element.getroottree().getroot().tag) not in _ROOT_TAGS:
+                    return None
+                root_checked = True
+            if _local(element.tag) not in _ENTRY_TAGS:
+                continue
+
+            entry = _entry(element, dates)
+            # Libera la voce e quelle precedenti: la memoria resta costante
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+            if cutoff_time is not None and 'published_parsed' in entry:
+                if datetime(*entry['published_parsed']) < cutoff_time:
+                    old_in_a_row += 1
+                    if old_in_a_row >= stop_after:
+                        return FastFeed(entries, stopped_early=True)
+                    continue
+                old_in_a_row = 0
+            entries.append(entry)
+    except etree.XMLSyntaxError:
+        return None
+
+    return FastFeed(entries) if root_checked else None
@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class FeedCache:
+    """Cache persistente dei validatori HTTP (ETag/Last-Modified) per URL del feed"""
+    
+    def __init__(self, path: str = 'data/sources/http_cache.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        # Validatori non ancora confermati: url -> {'etag', 'last_modified'}
+        self.pending = {}
+        
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable feed cache {path}: {e}")
+                self.entries = {}
+    
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Header per una richiesta condizionale verso url"""
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def record_hit(self, url: str):
+        """Registra una risposta 304 Not Modified"""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry['hits'] = entry.get('hits', 0) + 1
+    
+    def record_miss(self, url: str, response_headers):
+        """Registra una risposta completa; i validatori valgono dopo commit()"""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry['misses'] = entry.get('misses', 0) + 1
+            self.pending[url] = {
+                'etag': response_headers.get('ETag'),
+                'last_modified': response_headers.get('Last-Modified')
+            }
+    
+    def commit(self, urls: Optional[Iterable[str]] = None):
+        """Conferma i validatori in attesa degli url indicati (tutti con None) e salva"""
+        with self._lock:
+            for url in list(self.pending) if urls is None else urls:
+                if url in self.pending:
+                    self.entries.setdefault(url, {}).update(self.pending.pop(url))
+        self.save()
+    
+    def rollback(self, urls: Optional[Iterable[str]] = None):
+        """Scarta i validatori in attesa: il feed verrà scaricato di nuovo"""
+        with self._lock:
+            for url in list(self.pending) if urls is None else urls:
+                self.pending.pop(url, None)
+    
+    def counts(self, url: str) -> Dict[str, int]:
+        entry = self.entries.get(url, {})
+        return {'hits': entry.get('hits', 0), 'misses': entry.get('misses', 0)}
+    
+    def save(self):
+        """Salva la cache su disco"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,198 @@
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+
+# Prefisso comune delle metriche esportate
+PREFIX = 'tracker'
+
+
+class _NullTimer:
+    """Timer che non misura nulla, usato quando le metriche sono disattivate"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry: 'Metrics', name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Metrics:
+    """Contatori e tempi per fase e per fonte, esportabili per Prometheus o in JSON"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = datetime.now()
+        self.counters = {}
+        # (nome, etichette) -> [conteggio, somma, massimo]
+        self.timings = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> Tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrementa un contatore"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Registra una durata"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            timing = self.timings.setdefault(key, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def timer(self, name: str, **labels):
+        """Context manager che registra la durata del blocco"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def rows_per_second(self) -> Dict[str, float]:
+        """Righe al secondo per fase, da rows_total e stage_seconds con la stessa etichetta stage"""
+        rates = {}
+        for (name, labels), rows in self.counters.items():
+            if name != 'rows_total':
+                continue
+            timing = self.timings.get(('stage_seconds', labels))
+            if timing and timing[1] > 0:
+                rates[dict(labels)['stage']] = round(rows / timing[1], 1)
+        return rates
+
+    def snapshot(self) -> Dict:
+        """Riepilogo dell'esecuzione in forma serializzabile"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            timings = [
+                {'name': name, 'labels': dict(labels), 'count': count,
+                 'seconds': round(total, 6), 'max_seconds': round(peak, 6)}
+                for (name, labels), (count, total, peak) in sorted(self.timings.items())
+            ]
+            rates = self.rows_per_second()
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'counters': counters,
+            'timings': timings,
+            'rows_per_second': rates
+        }
+
+    def to_prometheus(self) -> str:
+        """Metriche nel formato di testo di Prometheus"""
+        snapshot = self.snapshot()
+        lines, declared = [], set()
+
+        def declare(metric: str, kind: str):
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f'# TYPE {metric} {kind}')
+
+        for counter in snapshot['counters']:
+            metric = f"{PREFIX}_{counter['name']}"
+            declare(metric, 'counter')
+            lines.append(f"{metric}{_labels(counter['labels'])} {counter['value']}")
+
+        for timing in snapshot['timings']:
+            metric = f"{PREFIX}_{timing['name']}"
+            declare(metric, 'summary')
+            labels = _labels(timing['labels'])
+            lines.append(f"{metric}_sum{labels} {timing['seconds']}")
+            lines.append(f"{metric}_count{labels} {timing['count']}")
+
+        for stage, rate in sorted(snapshot['rows_per_second'].items()):
+            metric = f'{PREFIX}_rows_per_second'
+            declare(metric, 'gauge')
+            lines.append(f"{metric}{_labels({'stage': stage})} {rate}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Scrive il file per il textfile collector di node_exporter (sostituzione atomica)"""
+        _write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path: str, **extra):
+        """Scrive il riepilogo JSON dell'esecuzione, con eventuali campi aggiuntivi"""
+        _write_atomic(path, json.dumps(dict(self.snapshot(), **extra), ensure_ascii=False, indent=2))
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in sorted(labels.items())
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _write_atomic(path: str, text: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Registro condiviso da collector, processore e run.py
+metrics = Metrics()
+
+
+def timed_stage(stage: str, rows: str = 'input'):
+    """Decoratore per i metodi di elaborazione: durata e righe della fase"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            metrics.observe('stage_seconds', time.perf_counter() - start, stage=stage)
+            counted = result if rows == 'output' else (args[1] if len(args) > 1 else None)
+            if hasattr(counted, '__len__'):
+                metrics.inc('rows_total', len(counted), stage=stage)
+            return result
+        return wrapper
+    return decorator
+
+
+def enable_metrics(enabled: bool = True) -> Metrics:
+    """Attiva (o disattiva) il registro condiviso e lo restituisce"""
+    metrics.enabled = enabled
+    return metrics
@@ -0,0 +1,113 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+_WORD = re.compile(r'\w+')
+
+
+class KeywordMatcher:
+    """Trova le parole chiave di un vocabolario in un testo (sottostringhe o, con word_boundary, parole intere)"""
+
+    def __init__(self, terms: Iterable[str], word_boundary: bool = False):
+        self.terms = list(dict.fromkeys(term.lower() for term in terms if term))
+        self.word_boundary = word_boundary
+
+        # Parole chiave di una sola parola, confrontate con le parole del testo
+        self._words = frozenset(term for term in self.terms if _WORD.fullmatch(term))
+        # Le altre (più parole, punteggiatura): regex solo se tutte le loro parole sono nel testo
+        self._phrases = [
+            (term, frozenset(_WORD.findall(term)), re.compile(rf'\b{re.escape(term)}\b'))
+            for term in self.terms if term not in self._words
+        ]
+
+    def find(self, text: str) -> Set[str]:
+        """Restituisce l'insieme delle parole chiave presenti nel testo"""
+        text = text.lower()
+        if not self.word_boundary:
+            # Una ricerca in C per parola chiave: più veloce di ogni regex a più rami
+            return {term for term in self.terms if term in text}
+
+        words = set(_WORD.findall(text))
+        hits = set(self._words.intersection(words))
+        for term, term_words, pattern in self._phrases:
+            if term_words <= words and pattern.search(text):
+                hits.add(term)
+        return hits
+
+
+    def masks(self, texts: Sequence[str]):
+        """Matrice booleana testi x self.terms, equivalente a find() su ogni testo"""
+        # numpy/pyarrow servono solo all'elaborazione a colonne, non al collector
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        lowered = [text.lower() for text in texts]
+        masks = np.zeros((len(lowered), len(self.terms)), dtype=bool)
+        if not lowered:
+            return masks
+
+        # Unità cercate nei blocchi: le parole chiave semplici e le parti delle frasi
+        if self.word_boundary:
+            parts = [[term] if term in self._words else _WORD.findall(term) for term in self.terms]
+        else:
+            parts = [[part for part in term.split(' ') if part] for term in self.terms]
+        units = list(dict.fromkeys(part for term_parts in parts for part in term_parts))
+        position = {unit: j for j, unit in enumerate(units)}
+
+        # Ogni testo diviso una volta ai blocchi tra spazi (un'unità non li
+        # attraversa): le unità si cercano solo tra i blocchi distinti
+        chunks = pc.split_pattern(pa.array(lowered, pa.string()), ' ')
+        rows = pc.list_parent_indices(chunks).to_numpy()
+        encoded = pc.list_flatten(chunks).dictionary_encode()
+        codes = encoded.indices.to_numpy()
+        if self.word_boundary:
+            pairs = [(c, position[word]) for c, chunk in enumerate(encoded.dictionary.to_pylist())
+                     for word in set(_WORD.findall(chunk)) if word in position]
+            pair_chunks, pair_units = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+        else:
+            found = [np.flatnonzero(pc.match_substring(encoded.dictionary, unit).to_numpy(zero_copy_only=False))
+                     for unit in units]
+            pair_chunks = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+            pair_units = np.repeat(np.arange(len(units)), [len(chunk_ids) for chunk_ids in found])
+            order = np.argsort(pair_chunks, kind='stable')
+            pair_chunks, pair_units = pair_chunks[order], pair_units[order]
+
+        # Dai blocchi distinti ai testi: ogni blocco porta le sue unità
+        counts = np.bincount(pair_chunks, minlength=len(encoded.dictionary))
+        starts = np.cumsum(counts) - counts
+        hit = np.flatnonzero(counts[codes])
+        per_hit = counts[codes[hit]]
+        offsets = np.arange(per_hit.sum()) - np.repeat(np.cumsum(per_hit) - per_hit, per_hit)
+        unit_masks = np.zeros((len(lowered), len(units)), dtype=bool)
+        unit_masks[np.repeat(rows[hit], per_hit), pair_units[np.repeat(starts[codes[hit]], per_hit) + offsets]] = True
+
+        phrases = {term: pattern for term, _, pattern in self._phrases}
+        for i, term in enumerate(self.terms):
+            columns = [position[part] for part in parts[i]]
+            if parts[i] == [term]:
+                masks[:, i] = unit_masks[:, columns[0]]
+                continue
+            # Frasi: verifica come in find() solo sui testi che ne contengono tutte le parti
+            candidates = np.flatnonzero(unit_masks[:, columns].all(axis=1))
+            if self.word_boundary:
+                masks[candidates, i] = [phrases[term].search(lowered[row]) is not None for row in candidates]
+            else:
+                masks[candidates, i] = [term in lowered[row] for row in candidates]
+        return masks
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(terms: Tuple[str, ...], word_boundary: bool) -> KeywordMatcher:
+    return KeywordMatcher(terms, word_boundary)
+
+
+def get_matcher(*vocabularies: Iterable[str], word_boundary: bool = False) -> KeywordMatcher:
+    """Matcher condiviso per l'unione dei vocabolari, costruito una volta sola"""
+    terms = tuple(term for vocabulary in vocabularies for term in vocabulary)
+    return _cached_matcher(terms, word_boundary)
+
+
+def country_aliases(country_keywords: Dict[str, List[str]]) -> List[str]:
+    """Tutti gli alias dei paesi in un'unica lista"""
+    return [keyword for keywords in country_keywords.values() for keyword in keywords]
@@ -1,13 +1,40 @@
 import feedparser
 import requests
 from datetime import datetime, timedelta
-import pandas as pd
 import json
 import os
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+
+from article_record import Article, articles_to_frame
+from dedup_index import DedupIndex
+import fast_feed
+from feed_cache import FeedCache
+from instrumentation import metrics
+from keyword_matcher import get_matcher
+from poll_state import PollState
+
+USER_AGENT = 'geopolitical-tensions-tracker/1.0'
 
 class NewsCollector:
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = 'data/sources/http_cache.json',
+                 word_boundary: bool = False,
+                 dedup_path: Optional[str] = 'data/sources/dedup_index.sqlite3',
+                 poll_state_path: Optional[str] = 'data/sources/poll_state.json',
+                 fast_parser: bool = False):
+        self.fetch_stats = {}
+        # True: conta solo parole intere ("warning" non vale come "war")
+        self.word_boundary = word_boundary
+        # Cache ETag/Last-Modified: None disattiva le richieste condizionali
+        self.feed_cache = FeedCache(cache_path) if cache_path else None
+        # Indice degli articoli già salvati: None disattiva la deduplicazione
+        self.dedup_index = DedupIndex(dedup_path) if dedup_path else None
+        # Statistiche di pubblicazione per feed: None disattiva il polling adattivo
+        self.poll_state = PollState(poll_state_path) if poll_state_path else None
+        # True: feed letti con lxml (fast_feed), feedparser solo per quelli malformati
+        self.fast_parser = fast_parser and fast_feed.available()
+        
         # RSS feed gratuiti di fonti affidabili
         self.rss_feeds = {
             'reuters_world': 'https://feeds.reuters.com/reuters/worldNews',
@@ -18,6 +45,10 @@ class NewsCollector:
             'aljazeera': 'https://www.aljazeera.com/xml/rss/all.xml'
         }
         
+        # Intervallo di polling iniziale (minuti) per feed, usato dalla modalità
+        # daemon finché poll_state non ha osservazioni sul feed
+        self.poll_intervals = {source: 15 for source in self.rss_feeds}
+        
         # Parole chiave per tensioni geopolitiche
         self.tension_keywords = [
             'war', 'conflict', 'military', 'sanctions', 'diplomacy',
@@ -32,70 +63,246 @@ class NewsCollector:
             'palestine', 'iran', 'north korea', 'syria', 'afghanistan',
             'myanmar', 'belarus', 'georgia', 'armenia', 'azerbaijan'
         ]
+        
+        # Matcher di parole chiave e regioni, costruito una volta per tutti gli articoli
+        self.matcher = get_matcher(self.tension_keywords, self.regions, word_boundary=word_boundary)
+        # Punti per parola trovata: 1 per le parole chiave, 2 per le regioni
+        self.keyword_points = {}
+        for keyword in self.tension_keywords:
+            self.keyword_points[keyword] = self.keyword_points.get(keyword, 0) + 1
+        for region in self.regions:
+            self.keyword_points[region] = self.keyword_points.get(region, 0) + 2
     
-    def collect_news(self, hours_back: int = 24) -> List[Dict]:
-        """Raccoglie notizie dalle ultime ore specificate"""
+    def collect_news(self, hours_back: int = 24, concurrent: bool = False,
+                     max_workers: int = 4, timeout: float = 15.0) -> List[Article]:
+        """Raccoglie notizie dalle ultime ore (timeout: secondi massimi di download per feed)"""
         all_articles = []
         cutoff_time = datetime.now() - timedelta(hours=hours_back)
+        self.fetch_stats = {}
+        
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._fetch_feed, source, url, timeout, cutoff_time): source
+                    for source, url in self.rss_feeds.items()
+                }
+                # Mantieni l'ordine dei feed indipendentemente dal completamento
+                results = {futures[future]: future.result() for future in as_completed(futures)}
+            fetched = [results[source] for source in self.rss_feeds]
+        else:
+            fetched = [self._fetch_feed(source, url, timeout, cutoff_time) for source, url in self.rss_feeds.items()]
+        
+        for source, feed in fetched:
+            all_articles.extend(self._process_feed(source, feed, cutoff_time))
+        
+        self._save_feed_state()
         
-        for source, url in self.rss_feeds.items():
+        self._print_fetch_stats()
+        return all_articles
+    
+    def collect_feed(self, source: str, hours_back: int = 24, timeout: float = 15.0) -> List[Article]:
+        """Raccoglie un singolo feed (per il polling indipendente dei feed)"""
+        cutoff_time = datetime.now() - timedelta(hours=hours_back)
+        _, feed = self._fetch_feed(source, self.rss_feeds[source], timeout, cutoff_time)
+        articles = self._process_feed(source, feed, cutoff_time)
+        self._save_feed_state()
+        return articles
+    
+    def poll_interval(self, source: str) -> float:
+        """Intervallo di polling del feed in minuti, adattato alla frequenza di pubblicazione"""
+        default = self.poll_intervals.get(source, 15)
+        if self.poll_state is None:
+            return default
+        return self.poll_state.interval(source, default)
+    
+    def _process_feed(self, source: str, feed, cutoff_time: datetime) -> List[Article]:
+        """Articoli di un feed scaricato; un errore sulle voci riguarda solo quel feed"""
+        articles = []
+        if feed is not None:
             try:
-                print(f"Collecting from {source}...")
-                feed = feedparser.parse(url)
-                
-                for entry in feed.entries:
-                    # Parsing della data
-                    try:
-                        if hasattr(entry, 'published_parsed'):
-                            article_time = datetime(*entry.published_parsed[:6])
-                        elif hasattr(entry, 'updated_parsed'):
-                            article_time = datetime(*entry.updated_parsed[:6])
-                        else:
-                            article_time = datetime.now()
-                    except:
-                        article_time = datetime.now()
-                    
-                    # Filtra solo articoli recenti
-                    if article_time >= cutoff_time:
-                        article = {
-                            'source': source,
-                            'title': entry.get('title', ''),
-                            'description': entry.get('summary', ''),
-                            'link': entry.get('link', ''),
-                            'published': article_time.isoformat(),
-                            'tension_score': self._calculate_tension_score(
-                                entry.get('title', '') + ' ' + entry.get('summary', '')
-                            )
-                        }
-                        all_articles.append(article)
-                        
+                articles = self._parse_entries(source, feed, cutoff_time)
             except Exception as e:
-                print(f"Error collecting from {source}: {e}")
+                self.fetch_stats[source]['error'] = str(e)
+                print(f"Error parsing entries from {source}: {e}")
+                # Le voci già registrate vanno raccolte di nuovo al prossimo fetch
+                self.rollback([source])
+        self._record_fetch(source, articles)
+        return articles
+    
+    def _record_fetch(self, source: str, articles: List[Article]):
+        """Aggiorna statistiche e stato del polling dopo il fetch di un feed"""
+        stats = self.fetch_stats[source]
+        stats['kept'] = len(articles)
+        self._export_fetch_stats(source, stats)
+        # Un fetch fallito non dice nulla sulla frequenza di pubblicazione
+        if self.poll_state is not None and not stats['error']:
+            self.poll_state.record_fetch(source, [article.published for article in articles])
+    
+    @staticmethod
+    def _export_fetch_stats(source: str, stats: Dict):
+        """Riporta le statistiche del fetch nel registro delle metriche"""
+        if not metrics.enabled:
+            return
+        metrics.observe('fetch_seconds', stats['fetch_seconds'], source=source)
+        metrics.inc('fetches_total', source=source)
+        if stats['error']:
+            metrics.inc('fetch_errors_total', source=source)
+            return
+        if stats['not_modified']:
+            metrics.inc('fetch_not_modified_total', source=source)
+            return
+        metrics.observe('parse_seconds', stats['parse_seconds'], source=source)
+        metrics.inc('feeds_parsed_total', source=source, parser=stats['parser'])
+        metrics.inc('fetch_bytes_total', stats['bytes'], source=source)
+        metrics.inc('entries_parsed_total', stats['entries'], source=source)
+        metrics.inc('entries_kept_total', stats['kept'], source=source)
+        metrics.inc('dedup_drops_total', stats['duplicates'], source=source)
+    
+    def _save_feed_state(self):
+        # La cache HTTP si salva con gli articoli (commit), non alla raccolta
+        if self.poll_state is not None:
+            self.poll_state.save()
+    
+    def commit(self, sources: Optional[List[str]] = None):
+        """Conferma deduplicazione e cache HTTP delle fonti (tutte con None), dopo il salvataggio degli articoli"""
+        if self.dedup_index is not None:
+            self.dedup_index.commit(sources)
+        if self.feed_cache is not None:
+            self.feed_cache.commit(None if sources is None else [self.rss_feeds[source] for source in sources])
+    
+    def rollback(self, sources: Optional[List[str]] = None):
+        """Scarta lo stato in attesa delle fonti indicate: verranno raccolte di nuovo"""
+        if self.dedup_index is not None:
+            self.dedup_index.rollback(sources)
+        if self.feed_cache is not None:
+            self.feed_cache.rollback(None if sources is None else [self.rss_feeds[source] for source in sources])
+    
+    def _fetch_feed(self, source: str, url: str, timeout: float,
+                    cutoff_time: Optional[datetime] = None) -> Tuple[str, Optional[feedparser.FeedParserDict]]:
+        """Scarica e interpreta un singolo feed, registrando i tempi"""
+        print(f"Collecting from {source}...")
+        start = time.perf_counter()
+        stats = {'fetch_seconds': 0.0, 'parse_seconds': 0.0, 'bytes': 0, 'entries': 0, 'kept': 0,
+                 'duplicates': 0, 'not_modified': False, 'error': None, 'parser': None}
+        self.fetch_stats[source] = stats
+        
+        headers = {'User-Agent': USER_AGENT}
+        if self.feed_cache is not None:
+            headers.update(self.feed_cache.request_headers(url))
+        
+        try:
+            with requests.get(url, timeout=timeout, headers=headers, stream=True) as response:
+                # Feed invariato dall'ultima esecuzione: niente parsing
+                if response.status_code == 304:
+                    stats['fetch_seconds'] = round(time.perf_counter() - start, 3)
+                    stats['not_modified'] = True
+                    if self.feed_cache is not None:
+                        self.feed_cache.record_hit(url)
+                    return source, None
+                
+                response.raise_for_status()
+                content = self._read_body(response, start + timeout)
+            stats['fetch_seconds'] = round(time.perf_counter() - start, 3)
+            stats['bytes'] = len(content)
+            
+            parse_start = time.perf_counter()
+            feed = fast_feed.parse_feed(content, cutoff_time) if self.fast_parser else None
+            stats['parser'] = 'lxml'
+            if feed is None:
+                feed = feedparser.parse(content, response_headers=dict(response.headers))
+                stats['parser'] = 'feedparser'
+            stats['parse_seconds'] = round(time.perf_counter() - parse_start, 3)
+            stats['entries'] = len(feed.entries)
+            # Validatori solo per un feed interpretato: confermati con gli articoli
+            if self.feed_cache is not None:
+                self.feed_cache.record_miss(url, response.headers)
+            return source, feed
+        except Exception as e:
+            stats['fetch_seconds'] = round(time.perf_counter() - start, 3)
+            stats['error'] = str(e)
+            print(f"Error collecting from {source}: {e}")
+            return source, None
+    
+    @staticmethod
+    def _read_body(response, deadline: float) -> bytes:
+        """Legge il corpo della risposta, interrompendo il download alla scadenza (perf_counter)"""
+        # Il timeout di requests vale per ogni lettura dal socket: un feed che
+        # arriva a piccoli pezzi lo rispetterebbe senza mai finire
+        chunks = []
+        for chunk in response.iter_content(16 * 1024):
+            chunks.append(chunk)
+            if time.perf_counter() > deadline:
+                raise requests.Timeout('download del feed oltre il timeout')
+        return b''.join(chunks)
+    
+    def _parse_entries(self, source: str, feed, cutoff_time: datetime) -> List[Article]:
+        """Estrae gli articoli recenti dalle voci di un feed"""
+        articles = []
+        # Voci senza data (o con una data non valida): ora della raccolta
+        now = datetime.now()
+        dedup_index = self.dedup_index
+        
+        for entry in feed.entries:
+            # Parsing della data
+            parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+            try:
+                article_time = datetime(*parsed[:6]) if parsed else now
+            except (TypeError, ValueError):
+                article_time = now
+            
+            # Filtra solo articoli recenti
+            if article_time < cutoff_time:
                 continue
+            
+            title = entry.get('title', '')
+            link = entry.get('link', '')
+            # Scarta gli articoli già salvati nelle esecuzioni precedenti
+            if dedup_index is not None and not dedup_index.add(source, link, title):
+                self.fetch_stats[source]['duplicates'] += 1
+                continue
+            
+            summary = entry.get('summary', '')
+            articles.append(Article(source, title, summary, link, article_time,
+                                    self._calculate_tension_score(title + ' ' + summary)))
         
-        return all_articles
+        return articles
+    
+    def _print_fetch_stats(self):
+        """Mostra i tempi di raccolta per ogni fonte"""
+        print("\nFetch timings:")
+        for source, stats in self.fetch_stats.items():
+            if stats['error']:
+                status = f"error: {stats['error']}"
+            elif stats['not_modified']:
+                status = "not modified (cache hit)"
+            else:
+                status = f"{stats['kept']}/{stats['entries']} entries kept, {stats['duplicates']} duplicates skipped"
+            
+            cache = ''
+            if self.feed_cache is not None:
+                counts = self.feed_cache.counts(self.rss_feeds[source])
+                cache = f"  cache {counts['hits']} hits/{counts['misses']} misses"
+            
+            polling = ''
+            if self.poll_state is not None and self.poll_state.efficiency(source) is not None:
+                polling = (f"  {self.poll_state.efficiency(source):.2f} new/fetch,"
+                           f" next poll {self.poll_interval(source):.0f} min")
+            parser = f" ({stats['parser']})" if self.fast_parser and stats['parser'] else ''
+            print(f"- {source:<15} fetch {stats['fetch_seconds']:>6.2f}s  parse {stats['parse_seconds']:>6.2f}s{parser}  "
+                  f"{status}{cache}{polling}")
     
     def _calculate_tension_score(self, text: str) -> float:
         """Calcola un punteggio di tensione basato su parole chiave"""
-        text_lower = text.lower()
+        hits = self.matcher.find(text)
         
-        # Punteggio base per parole chiave di tensione
-        tension_score = 0
-        for keyword in self.tension_keywords:
-            if keyword in text_lower:
-                tension_score += 1
-        
-        # Punteggio aggiuntivo per regioni sensibili
-        region_score = 0
-        for region in self.regions:
-            if region in text_lower:
-                region_score += 2
+        # 1 punto per parola chiave di tensione, 2 per regione sensibile
+        points = sum(self.keyword_points.get(hit, 0) for hit in hits)
         
         # Normalizza il punteggio (0-10)
-        total_score = min(10, (tension_score + region_score) / 2)
+        total_score = min(10, points / 2)
         return round(total_score, 2)
     
-    def save_to_json(self, articles: List[Dict], filename: str = None):
+    def save_to_json(self, articles: List[Article], filename: str = None):
         """Salva gli articoli in un file JSON"""
         if filename is None:
             filename = f"data/raw/news_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -103,19 +310,33 @@ class NewsCollector:
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(articles, f, ensure_ascii=False, indent=2)
+            json.dump([article.to_dict() for article in articles], f, ensure_ascii=False, indent=2)
+        
+        self.commit()
         
         print(f"Saved {len(articles)} articles to {filename}")
         return filename
 
+    def save_to_store(self, articles: List[Article], base_dir: Optional[str] = None,
+                      sources: Optional[List[str]] = None) -> List[str]:
+        """Aggiunge gli articoli all'archivio Parquet e conferma le fonti indicate (tutte con None)"""
+        # pandas/pyarrow servono solo qui: importarli subito rallenta l'avvio
+        import article_store
+        
+        base_dir = base_dir or article_store.RAW_STORE
+        files = article_store.write_raw_articles(articles, base_dir)
+        self.commit(sources)
+        print(f"Saved {len(articles)} articles to {base_dir} ({len(files)} files)")
+        return files
+
 def main():
     collector = NewsCollector()
-    articles = collector.collect_news(hours_back=24)
-    filename = collector.save_to_json(articles)
+    articles = collector.collect_news(hours_back=24, concurrent=True)
+    collector.save_to_store(articles)
     
     # Mostra statistiche
     if articles:
-        df = pd.DataFrame(articles)
+        df = articles_to_frame(articles)
         print(f"\nCollected {len(articles)} articles")
         print(f"Average tension score: {df['tension_score'].mean():.2f}")
         print(f"Max tension score: {df['tension_score'].max():.2f}")
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class PollState:
+    """Stato persistente del polling adattivo per feed"""
+
+    def __init__(self, path: str = 'data/sources/poll_state.json',
+                 min_interval: float = 5, max_interval: float = 120, alpha: float = 0.3):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Peso delle nuove osservazioni nella media mobile
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.feeds = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.feeds = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable poll state {path}: {e}")
+                self.feeds = {}
+
+    def interval(self, source: str, default: float) -> float:
+        """Intervallo di polling del feed in minuti (default se non ci sono osservazioni)"""
+        gap = self.feeds.get(source, {}).get('arrival_gap')
+        if gap is None:
+            return default
+        return round(min(self.max_interval, max(self.min_interval, gap)), 2)
+
+    def record_fetch(self, source: str, published: List[datetime], now: Optional[datetime] = None):
+        """Registra un fetch e le date di pubblicazione degli articoli nuovi trovati"""
+        now = now or datetime.now()
+        with self._lock:
+            feed = self.feeds.setdefault(source, {
+                'fetches': 0, 'new_articles': 0, 'arrival_gap': None,
+                'last_article': None, 'last_fetch': None
+            })
+            feed['fetches'] += 1
+            feed['new_articles'] += len(published)
+            feed['last_fetch'] = now.isoformat()
+
+            last_article = datetime.fromisoformat(feed['last_article']) if feed['last_article'] else None
+            times = sorted(published)
+            if last_article is not None:
+                times = [last_article] + [t for t in times if t > last_article]
+
+            gaps = [(b - a).total_seconds() / 60 for a, b in zip(times, times[1:]) if b > a]
+            for gap in gaps:
+                self._observe(feed, gap)
+
+            if times:
+                feed['last_article'] = max(times).isoformat()
+            if not published and last_article is not None:
+                silence = (now - last_article).total_seconds() / 60
+                if feed['arrival_gap'] is None or silence > feed['arrival_gap']:
+                    self._observe(feed, silence)
+
+    def _observe(self, feed: Dict, gap: float):
+        if feed['arrival_gap'] is None:
+            feed['arrival_gap'] = gap
+        else:
+            feed['arrival_gap'] = self.alpha * gap + (1 - self.alpha) * feed['arrival_gap']
+
+    def efficiency(self, source: str) -> Optional[float]:
+        """Articoli nuovi per fetch (None se il feed non è mai stato interrogato)"""
+        feed = self.feeds.get(source)
+        if not feed or not feed['fetches']:
+            return None
+        return round(feed['new_articles'] / feed['fetches'], 2)
+
+    def save(self):
+        """Salva lo stato su disco"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.feeds, f, ensure_ascii=False, indent=2)
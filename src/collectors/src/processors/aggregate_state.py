@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from tension_indicators import TensionIndicators
+
+
+class AggregateState:
+    """Stato persistente per l'elaborazione incrementale"""
+
+    def __init__(self, path: str = 'data/processed/aggregate_state.json'):
+        self.path = path
+        self.files = []
+        self.countries = {}
+        self.dates = {}
+        self.indicators = TensionIndicators(self.indicators_path(path))
+
+        # Un record per articolo (chiave source+title) su disco, non in memoria:
+        # lo stato non cresce con l'archivio. Le modifiche diventano definitive con save()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.articles_path(path), check_same_thread=False, timeout=30)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            'key INTEGER PRIMARY KEY, published TEXT NOT NULL, date TEXT NOT NULL, '
+            'score REAL NOT NULL, countries TEXT NOT NULL)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS article_countries ('
+            'country TEXT NOT NULL, key INTEGER NOT NULL, PRIMARY KEY (country, key)'
+            ') WITHOUT ROWID'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS articles_date ON articles (date)')
+        self.conn.commit()
+        # Record accettati da update() e non ancora scritti (chiave -> record) e
+        # paesi già nel database degli articoli che sostituiscono
+        self._pending = {}
+        self._replaced = {}
+
+    @staticmethod
+    def indicators_path(path: str) -> str:
+        return os.path.join(os.path.dirname(path), 'indicators.json')
+
+    @staticmethod
+    def articles_path(path: str) -> str:
+        return os.path.splitext(path)[0] + '.sqlite3'
+
+    def reset(self):
+        """Svuota lo stato (per una ricostruzione completa)"""
+        self.files = []
+        self.countries = {}
+        self.dates = {}
+        self._pending = {}
+        self._replaced = {}
+        self.conn.execute('DELETE FROM articles')
+        self.conn.execute('DELETE FROM article_countries')
+        self.indicators.reset()
+
+    @classmethod
+    def load(cls, path: str = 'data/processed/aggregate_state.json') -> 'AggregateState':
+        state = cls(path)
+        if not os.path.exists(path):
+            # Record senza aggregati (es. file JSON cancellato): si riparte da zero
+            state.reset()
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            state.files = data.get('files', [])
+            state.countries = data.get('countries', {})
+            state.dates = data.get('dates', {})
+            if 'articles' in data:
+                # Stato salvato con i record nel file JSON: spostali nel database
+                state.conn.execute('DELETE FROM articles')
+                state.conn.execute('DELETE FROM article_countries')
+                state._pending = {state.key_id(key): record for key, record in data['articles'].items()}
+                state._flush()
+        state.indicators = TensionIndicators.load(cls.indicators_path(path))
+        if len(state) and not os.path.exists(state.indicators.path):
+            # Stato creato prima degli indicatori: ricostruiscili dai record degli articoli
+            for records in state._records():
+                state.indicators.update(pd.DataFrame(
+                    records, columns=['published', 'enhanced_tension_score', 'countries']
+                ).assign(published=lambda df: pd.to_datetime(df['published'])))
+        return state
+
+    def save(self):
+        self._flush()
+        self.conn.commit()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'files': self.files,
+                'countries': self.countries,
+                'dates': self.dates
+            }, f, ensure_ascii=False)
+        self.indicators.save()
+
+    def is_new(self) -> bool:
+        """Nessuno stato salvato né articoli elaborati: serve un'elaborazione completa"""
+        return not os.path.exists(self.path) and not len(self)
+
+    def __len__(self):
+        self._flush()
+        return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def _records(self, batch_size: int = 100000) -> Iterator[List]:
+        """Record degli articoli [published, score, countries], a lotti"""
+        self._flush()
+        cursor = self.conn.execute('SELECT published, score, countries FROM articles')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [[published, score, self._split(countries)] for published, score, countries in rows]
+
+    def _lookup(self, keys: List[int]) -> Dict[int, List]:
+        """Record già presenti per le chiavi indicate"""
+        self._flush()
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, published, score, countries FROM articles WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for key, published, score, countries in rows:
+                found[key] = [published, score, self._split(countries)]
+        return found
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        replaced, self._replaced = self._replaced, {}
+        self.conn.executemany(
+            'DELETE FROM article_countries WHERE country = ? AND key = ?',
+            [(country, key) for key, countries in replaced.items() for country in countries]
+        )
+        # In ordine di chiave: inserimenti molto più rapidi nei B-tree
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO articles (key, published, date, score, countries) VALUES (?, ?, ?, ?, ?)',
+            [(key, published, published[:10], score, '\x1f'.join(countries))
+             for key, (published, score, countries) in sorted(pending.items())]
+        )
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO article_countries (country, key) VALUES (?, ?)',
+            sorted((country, key) for key, (_, _, countries) in pending.items() for country in countries)
+        )
+
+    @staticmethod
+    def article_key(source: str, title: str) -> str:
+        return f"{source}\x1f{title}"
+
+    @staticmethod
+    def _split(countries: str) -> List[str]:
+        return countries.split('\x1f') if countries else []
+
+    @staticmethod
+    def key_id(key: str) -> int:
+        """Chiave intera (64 bit) di article_key nel database"""
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+    def known(self, df: pd.DataFrame) -> np.ndarray:
+        """True per gli articoli di df già presenti nello stato"""
+        keys = [self.key_id(self.article_key(source, title)) for source, title in zip(df['source'], df['title'])]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        return np.array([key in found for key in keys], dtype=bool)
+
+    def new_files(self, files: List[str]) -> List[str]:
+        """File grezzi non ancora elaborati"""
+        ingested = set(self.files)
+        return sorted(file for file in files if file not in ingested)
+
+    def update(self, df: pd.DataFrame, files: List[str]) -> pd.DataFrame:
+        """Aggiunge allo stato gli articoli di df; restituisce le righe entrate"""
+        accepted = []
+        keys = [self.key_id(self.article_key(source, title)) for source, title in zip(df['source'], df['title'])]
+        # Record già nello stato per gli articoli di df, aggiornati durante il ciclo
+        known = self._lookup(list(dict.fromkeys(keys)))
+
+        for index, key, row in zip(df.index, keys, df[['published', 'enhanced_tension_score', 'countries']].itertuples(index=False)):
+            published = row.published.isoformat()
+            previous = known.get(key)
+
+            if previous is not None:
+                if published <= previous[0]:
+                    continue
+                if key not in self._pending:
+                    self._replaced[key] = previous[2]
+                self._remove(key, previous)
+
+            record = [published, float(row.enhanced_tension_score), list(row.countries)]
+            known[key] = self._pending[key] = record
+            self._add(record)
+            accepted.append(index)
+
+        self.files.extend(file for file in files if file not in self.files)
+        accepted = df.loc[accepted]
+        self.indicators.update(accepted)
+        return accepted
+
+    def _add(self, record: List):
+        published, score, countries = record
+        for country in countries:
+            self._add_to(self.countries.setdefault(country, self._empty()), score, published)
+
+        date = published[:10]
+        day = self.dates.setdefault(date, dict(self._empty(), countries={}))
+        self._add_to(day, score, published)
+        for country in countries:
+            day['countries'][country] = day['countries'].get(country, 0) + 1
+
+    def _remove(self, key: int, record: List):
+        published, score, countries = record
+        for country in countries:
+            self._remove_from(
+                self.countries, country, key, record,
+                'SELECT MAX(a.score), MAX(a.published) FROM article_countries c JOIN articles a ON a.key = c.key '
+                'WHERE c.country = ? AND c.key != ?'
+            )
+
+        date = published[:10]
+        for country in countries:
+            self.dates[date]['countries'][country] -= 1
+            if self.dates[date]['countries'][country] == 0:
+                del self.dates[date]['countries'][country]
+        self._remove_from(
+            self.dates, date, key, record,
+            'SELECT MAX(score), MAX(published) FROM articles WHERE date = ? AND key != ?'
+        )
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {'count': 0, 'sum': 0.0, 'max': None, 'last_update': None}
+
+    @staticmethod
+    def _add_to(aggregate: Dict, score: float, published: str):
+        aggregate['count'] += 1
+        aggregate['sum'] += score
+        aggregate['max'] = score if aggregate['max'] is None else max(aggregate['max'], score)
+        if aggregate['last_update'] is None or published > aggregate['last_update']:
+            aggregate['last_update'] = published
+
+    def _remove_from(self, aggregates: Dict, name: str, key: int, record: List, query: str):
+        """Toglie un articolo da un aggregato; max e last_update vengono ricalcolati se necessario"""
+        published, score, _ = record
+        aggregate = aggregates[name]
+        aggregate['count'] -= 1
+        aggregate['sum'] -= score
+
+        if aggregate['count'] == 0:
+            del aggregates[name]
+            return
+
+        if score == aggregate['max'] or published == aggregate['last_update']:
+            # Il record rimosso è ancora nel database: la query esclude la sua chiave
+            self._flush()
+            aggregate['max'], aggregate['last_update'] = self.conn.execute(query, (name, key)).fetchone()
+
+    def country_summary(self) -> pd.DataFrame:
+        """Stessa tabella di DataProcessor.create_country_summary"""
+        if not self.countries:
+            return pd.DataFrame()
+
+        rows = [
+            {
+                'country': country,
+                'avg_tension': round(aggregate['sum'] / aggregate['count'], 2),
+                'max_tension': round(aggregate['max'], 2),
+                'article_count': aggregate['count'],
+                'last_update': pd.Timestamp(aggregate['last_update'])
+            }
+            for country, aggregate in sorted(self.countries.items())
+        ]
+        country_summary = pd.DataFrame(rows)
+        return country_summary.sort_values('avg_tension', ascending=False)
+
+    def timeline(self) -> pd.DataFrame:
+        """Stessa tabella di DataProcessor.create_timeline"""
+        if not self.dates:
+            return pd.DataFrame()
+
+        rows = [
+            {
+                'date': pd.Timestamp(date).date(),
+                'avg_tension': round(aggregate['sum'] / aggregate['count'], 2),
+                'max_tension': round(aggregate['max'], 2),
+                'article_count': aggregate['count'],
+                'countries_mentioned': len(aggregate['countries'])
+            }
+            for date, aggregate in sorted(self.dates.items())
+        ]
+        return pd.DataFrame(rows)
@@ -0,0 +1,259 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import pandas as pd
+
+from instrumentation import metrics
+
+
+def utc_now() -> datetime:
+    """Ora UTC senza fuso, come le date di pubblicazione dei feed"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class StdoutSink:
+    name = 'stdout'
+
+    def send(self, alert: Dict):
+        print(f"🚨 [{alert['rule']}] {alert['message']}", flush=True)
+
+
+class FileSink:
+    """Un avviso JSON per riga"""
+
+    def __init__(self, path: str = 'logs/alerts.jsonl'):
+        self.path = path
+        self.name = f'file:{path}'
+
+    def send(self, alert: Dict):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """POST JSON verso un webhook (Slack, Mattermost, servizi interni...)"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self.name = f'webhook:{url}'
+
+    def send(self, alert: Dict):
+        import requests
+        response = requests.post(self.url, json=dict(alert, text=alert['message']), timeout=self.timeout)
+        response.raise_for_status()
+
+
+def sink_from_spec(spec: str):
+    """'stdout', un URL http(s) oppure il percorso di un file JSONL"""
+    if spec == 'stdout':
+        return StdoutSink()
+    if spec.startswith(('http://', 'https://')):
+        return WebhookSink(spec)
+    return FileSink(spec)
+
+
+class AlertDispatcher:
+    """Consegna gli avvisi in background, un thread e una coda per destinazione"""
+
+    def __init__(self, sinks: List, max_per_minute: float = 30, queue_size: int = 1000):
+        self.sinks = sinks
+        self.max_per_minute = max_per_minute
+        self.stats = {'sent': 0, 'rate_limited': 0, 'queue_full': 0, 'errors': 0}
+        self.latencies = []
+        self._lock = threading.Lock()
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in sinks]
+        self._threads = [
+            threading.Thread(target=self._deliver, args=(sink, sink_queue), daemon=True)
+            for sink, sink_queue in zip(sinks, self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, alert: Dict):
+        for sink_queue in self._queues:
+            try:
+                sink_queue.put_nowait(alert)
+            except queue.Full:
+                self._count('queue_full')
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _deliver(self, sink, sink_queue: queue.Queue):
+        tokens, refilled = self.max_per_minute, time.monotonic()
+        while True:
+            alert = sink_queue.get()
+            if alert is None:
+                return
+
+            now = time.monotonic()
+            tokens = min(self.max_per_minute, tokens + (now - refilled) * self.max_per_minute / 60)
+            refilled = now
+            if tokens < 1:
+                self._count('rate_limited')
+                continue
+            tokens -= 1
+
+            try:
+                sink.send(alert)
+            except Exception as e:
+                self._count('errors')
+                print(f"❌ Alert delivery to {sink.name} failed: {e}", flush=True)
+                continue
+
+            # Latenza dalla pubblicazione dell'articolo alla consegna dell'avviso
+            latency = (utc_now() - datetime.fromisoformat(alert['published'])).total_seconds()
+            with self._lock:
+                self.stats['sent'] += 1
+                self.latencies.append(latency)
+            metrics.inc('alerts_sent_total', rule=alert['rule'], sink=sink.name)
+            metrics.observe('alert_latency_seconds', latency, rule=alert['rule'])
+
+    def close(self, timeout: float = 10.0):
+        """Consegna gli avvisi ancora in coda (al massimo timeout secondi) e ferma i thread"""
+        for sink_queue in self._queues:
+            sink_queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+
+class AlertEngine:
+    """Regole di allerta valutate sugli articoli appena elaborati"""
+
+    def __init__(self, dispatcher: AlertDispatcher, state_path: str = 'data/processed/alerts_state.json',
+                 score_threshold: float = 8.0, min_sources: int = 3, window_minutes: int = 60,
+                 max_age_hours: int = 6):
+        self.dispatcher = dispatcher
+        self.state_path = state_path
+        self.score_threshold = score_threshold
+        self.min_sources = min_sources
+        self.window = timedelta(minutes=window_minutes)
+        self.max_age = timedelta(hours=max_age_hours)
+        self.cooldowns = {
+            'high_score': timedelta(days=7),
+            'country_spike': timedelta(hours=1),
+            'multi_source': self.window
+        }
+        self.suppressed = 0
+        # Menzioni recenti per paese: (published, source), per la regola multi_source
+        self.mentions = {}
+        self.sent_keys = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.sent_keys = json.load(f)
+
+    def evaluate(self, df: pd.DataFrame, indicators=None) -> List[Dict]:
+        """Applica le regole agli articoli di df e invia gli avvisi nuovi"""
+        alerts = []
+        with metrics.timer('stage_seconds', stage='alerts'):
+            if not df.empty:
+                recent = df[pd.to_datetime(df['published']) >= utc_now() - self.max_age]
+                recent = recent.sort_values('published')
+                alerts.extend(self._high_score(recent))
+                alerts.extend(self._multi_source(recent))
+                if indicators is not None:
+                    alerts.extend(self._country_spikes(recent, indicators))
+
+        submitted = []
+        for alert in alerts:
+            if self._is_duplicate(alert):
+                self.suppressed += 1
+                continue
+            self.dispatcher.submit(alert)
+            submitted.append(alert)
+        return submitted
+
+    @staticmethod
+    def _alert(rule: str, key: str, article, message: str, **extra) -> Dict:
+        return dict({
+            'rule': rule,
+            'key': key,
+            'message': message,
+            'title': article.title,
+            'source': article.source,
+            'link': article.link,
+            'score': float(article.enhanced_tension_score),
+            'published': pd.Timestamp(article.published).isoformat(),
+            'detected': utc_now().isoformat()
+        }, **extra)
+
+    def _high_score(self, df: pd.DataFrame) -> List[Dict]:
+        return [
+            self._alert('high_score', f'article:{article.source}:{article.title}', article,
+                        f"[{article.enhanced_tension_score:.1f}] {article.title} ({article.source}, "
+                        f"{', '.join(article.countries) or 'no country'})",
+                        countries=list(article.countries))
+            for article in df[df['enhanced_tension_score'] >= self.score_threshold].itertuples(index=False)
+        ]
+
+    def _multi_source(self, df: pd.DataFrame) -> List[Dict]:
+        alerts = []
+        for article in df.itertuples(index=False):
+            published = pd.Timestamp(article.published).to_pydatetime()
+            for country in article.countries:
+                mentions = self.mentions.setdefault(country, deque())
+                mentions.append((published, article.source))
+                while mentions and mentions[0][0] < published - self.window:
+                    mentions.popleft()
+                sources = sorted({source for _, source in mentions})
+                if len(sources) >= self.min_sources:
+                    alerts.append(self._alert(
+                        'multi_source', f'sources:{country}', article,
+                        f"{country} covered by {len(sources)} sources within "
+                        f"{int(self.window.total_seconds() // 60)} minutes: {', '.join(sources)}",
+                        country=country, sources=sources))
+        return alerts
+
+    def _country_spikes(self, df: pd.DataFrame, indicators) -> List[Dict]:
+        snapshot = indicators.snapshot()
+        if snapshot.empty:
+            return []
+        alerts = []
+        for row in snapshot[snapshot['anomaly']].itertuples(index=False):
+            mentioning = df[df['countries'].map(lambda countries: row.country in countries)]
+            if mentioning.empty:
+                continue
+            article = next(mentioning.iloc[[-1]].itertuples(index=False))
+            alerts.append(self._alert(
+                'country_spike', f'spike:{row.country}', article,
+                f"{row.country} tension spike: last hour {row.mean_1h:.2f} vs baseline {row.ewma:.2f} "
+                f"(z {row.zscore:+.2f}, {row.count_1h} articles)",
+                country=row.country, zscore=row.zscore))
+        return alerts
+
+    def _is_duplicate(self, alert: Dict) -> bool:
+        now = utc_now()
+        expires = self.sent_keys.get(alert['key'])
+        if expires is not None and datetime.fromisoformat(expires) > now:
+            return True
+        self.sent_keys[alert['key']] = (now + self.cooldowns[alert['rule']]).isoformat()
+        return False
+
+    def close(self, timeout: float = 10.0):
+        """Attende la consegna degli avvisi e salva le chiavi ancora valide"""
+        self.dispatcher.close(timeout)
+        now = utc_now().isoformat()
+        self.sent_keys = {key: expires for key, expires in self.sent_keys.items() if expires > now}
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(self.sent_keys, f, ensure_ascii=False, indent=2)
+
+    def summary(self) -> str:
+        stats = self.dispatcher.stats
+        latencies = sorted(self.dispatcher.latencies)
+        text = (f"alerts sent {stats['sent']}, duplicates suppressed {self.suppressed}, "
+                f"rate limited {stats['rate_limited']}, errors {stats['errors']}")
+        if latencies:
+            text += (f", latency p50 {latencies[len(latencies) // 2]:.1f}s"
+                     f" max {latencies[-1]:.1f}s (publication -> delivery)")
+        return text
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 """
 Script di avvio rapido per il Geopolitical Tensions Tracker
-Uso: python run.py [collect|process|dashboard|all]
+Uso: python run.py [collect|process|dashboard|report|all|daemon|setup]
 """
 
 import sys
 import os
 import subprocess
 import argparse
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+# Moduli del collector e del processore, relativi alla root del progetto
+sys.path.append(os.path.join('src', 'collectors'))
+sys.path.append(os.path.join('src', 'collectors', 'src', 'processors'))
+
 def run_command(command, description):
     """Esegue un comando e gestisce gli errori"""
     print(f"\n{'='*50}")
@@ -48,12 +54,15 @@ def setup_environment():
     
     print("✅ Ambiente configurato!")
 
-def collect_data():
+def collect_data(hours_back=24, fast_parser=False):
     """Raccoglie i dati dalle fonti"""
-    return run_command(
-        "cd src/collectors && python news_collector.py",
-        "Raccolta dati dalle fonti RSS"
-    )
+    from news_collector import NewsCollector
+    
+    with stage("Raccolta dati dalle fonti RSS", 'collect'):
+        collector = NewsCollector(fast_parser=fast_parser)
+        articles = collector.collect_news(hours_back=hours_back, concurrent=True)
+        collector.save_to_store(articles)
+    return True
 
 def process_data():
     """Processa i dati raccolti"""
@@ -75,17 +84,292 @@ def run_dashboard():
     except subprocess.CalledProcessError as e:
         print(f"❌ Errore nell'avvio della dashboard: {e}")
 
+@contextmanager
+def stage(description, name=None):
+    """Mostra subito inizio, fine e durata di una fase della pipeline"""
+    from instrumentation import metrics
+    
+    print(f"\n{'='*50}")
+    print(f"🔄 {description}", flush=True)
+    print(f"{'='*50}", flush=True)
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if name is not None:
+        metrics.observe('pipeline_stage_seconds', elapsed, stage=name)
+    print(f"✅ {description} completato in {elapsed:.2f}s", flush=True)
+
+def export_metrics(directory, **extra):
+    """Scrive metrics.prom (formato Prometheus) e run_summary.json in directory"""
+    from instrumentation import metrics
+    
+    if not metrics.enabled:
+        return
+    metrics.write_prometheus(os.path.join(directory, 'metrics.prom'))
+    metrics.write_json(os.path.join(directory, 'run_summary.json'), **extra)
+    print(f"📈 Metriche salvate in {directory}/", flush=True)
+
+def build_alerts(specs):
+    """Regole di allerta con le destinazioni indicate ('stdout', URL di un webhook o file JSONL)"""
+    if not specs:
+        return None
+    from alerting import AlertDispatcher, AlertEngine, sink_from_spec
+    
+    return AlertEngine(AlertDispatcher([sink_from_spec(spec) for spec in specs]))
+
+def close_alerts(alerts):
+    """Attende la consegna degli avvisi in coda e ne mostra il riepilogo"""
+    if alerts is None:
+        return
+    alerts.close()
+    print(f"🚨 Alerts: {alerts.summary()}", flush=True)
+
+def run_pipeline(hours_back=24, checkpoint=True, alert_sinks=None, fast_parser=False):
+    """Esegue raccolta ed elaborazione nello stesso processo"""
+    from news_collector import NewsCollector
+    from data_processor import DataProcessor
+    from aggregate_state import AggregateState
+    
+    timings = {}
+    pipeline_start = time.perf_counter()
+    
+    with stage("Raccolta dati dalle fonti RSS", 'collect'):
+        start = time.perf_counter()
+        collector = NewsCollector(fast_parser=fast_parser)
+        articles = collector.collect_news(hours_back=hours_back, concurrent=True)
+        timings['collect'] = time.perf_counter() - start
+    
+    raw_files = []
+    if checkpoint:
+        with stage("Checkpoint dei dati grezzi", 'checkpoint'):
+            start = time.perf_counter()
+            raw_files = collector.save_to_store(articles)
+            timings['checkpoint'] = time.perf_counter() - start
+    
+    with stage("Elaborazione e analisi dei dati", 'process'):
+        start = time.perf_counter()
+        processor = DataProcessor()
+        processor.alerts = build_alerts(alert_sinks)
+        state = AggregateState.load()
+        try:
+            if state.is_new():
+                # Primo avvio: elabora tutto l'archivio grezzo, più gli articoli
+                # raccolti se non sono stati scritti nell'archivio
+                result = processor.process_full(state, None if checkpoint else articles)
+            else:
+                result = processor.process_incremental(state, articles, raw_files)
+        finally:
+            close_alerts(processor.alerts)
+        
+        if result is None:
+            print("❌ Nessun dato da elaborare")
+            return False
+        
+        df_processed, country_summary, timeline = result
+        df_processed = processor.assign_stories(df_processed)
+        processor.save_processed_data(df_processed, country_summary, timeline)
+        state.save()
+        if not checkpoint:
+            # Articoli salvati solo nei dati processati: ora non vanno raccolti di nuovo
+            collector.commit()
+        timings['process'] = time.perf_counter() - start
+    
+    with stage("Generazione report", 'report'):
+        start = time.perf_counter()
+        generate_report()
+        timings['report'] = time.perf_counter() - start
+    
+    print(f"\n⏱️  Tempi: " + ', '.join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+          + f" | totale {time.perf_counter() - pipeline_start:.2f}s")
+    return True
+
+class PipelineDaemon:
+    """Processo sempre attivo: polling dei feed ed elaborazione sovrapposti"""
+    
+    def __init__(self, hours_back=24, jitter=0.2, queue_size=4, max_workers=4, metrics_dir=None,
+                 alert_sinks=None, fast_parser=False):
+        import queue
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        import schedule
+        from news_collector import NewsCollector
+        from data_processor import DataProcessor
+        from aggregate_state import AggregateState
+        
+        self.hours_back = hours_back
+        self.jitter = jitter
+        self.metrics_dir = metrics_dir
+        self.collector = NewsCollector(fast_parser=fast_parser)
+        self.processor = DataProcessor()
+        self.processor.alerts = build_alerts(alert_sinks)
+        self.state = AggregateState.load()
+        self.schedule = schedule
+        self.scheduler = schedule.Scheduler()
+        self.scheduled_bounds = {}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.processing_thread = threading.Thread(target=self._process_loop, daemon=True)
+    
+    def _interval_bounds(self, source):
+        """Intervallo di polling del feed in secondi, con jitter"""
+        minutes = self.collector.poll_interval(source)
+        low = max(1, int(minutes * 60 * (1 - self.jitter)))
+        high = max(low, int(minutes * 60 * (1 + self.jitter)))
+        return low, high
+    
+    def schedule_feeds(self):
+        for source in self.collector.rss_feeds:
+            self._schedule_feed(source)
+    
+    def _schedule_feed(self, source):
+        low, high = self._interval_bounds(source)
+        self.scheduled_bounds[source] = (low, high)
+        self.scheduler.every(low).to(high).seconds.do(self._submit_fetch, source).tag(source)
+    
+    def _submit_fetch(self, source):
+        # L'intervallo del feed è cambiato dopo l'ultimo fetch: sostituisci il job
+        if self._interval_bounds(source) != self.scheduled_bounds.get(source):
+            self._schedule_feed(source)
+            low, high = self.scheduled_bounds[source]
+            print(f"🔁 {source}: polling ogni {low}-{high}s", flush=True)
+            self._start_fetch(source)
+            return self.schedule.CancelJob
+        self._start_fetch(source)
+    
+    def _start_fetch(self, source):
+        with self.lock:
+            # Il download precedente non è ancora stato consegnato: salta questo giro
+            if source in self.in_flight:
+                print(f"⏳ {source}: fetch precedente ancora in coda, salto", flush=True)
+                return
+            self.in_flight.add(source)
+        self.executor.submit(self._fetch, source)
+    
+    def _fetch(self, source):
+        import queue
+        
+        try:
+            articles = self.collector.collect_feed(source, hours_back=self.hours_back)
+        except Exception as e:
+            print(f"❌ Errore nel polling di {source}: {e}", flush=True)
+            self.collector.rollback([source])
+            self._release([source])
+            return
+        # Blocca finché c'è posto in coda (backpressure verso i download); anche
+        # durante l'arresto l'elaborazione continua a svuotare la coda
+        while True:
+            try:
+                self.queue.put((source, articles), timeout=1)
+                break
+            except queue.Full:
+                print(f"⏳ Coda piena: {source} attende l'elaborazione", flush=True)
+    
+    def _release(self, sources):
+        """Il feed può essere interrogato di nuovo"""
+        with self.lock:
+            self.in_flight.difference_update(sources)
+    
+    def _process_loop(self):
+        import queue
+        
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            # Elabora insieme tutto quello che è già arrivato
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # None segue l'ultimo download: dopo questo lotto la coda è vuota
+            stopping = None in batch
+            batch = [item for item in batch if item is not None]
+            
+            batch_sources = [source for source, _ in batch]
+            articles = [article for _, feed_articles in batch for article in feed_articles]
+            try:
+                self._process_batch(articles, batch_sources)
+            finally:
+                self._release(batch_sources)
+    
+    def _process_batch(self, articles, batch_sources):
+        """Salva ed elabora un lotto, confermando solo i feed che contiene"""
+        try:
+            if not articles:
+                # Nessun articolo nuovo: restano da confermare i validatori HTTP
+                self.collector.commit(batch_sources)
+                return
+            start = time.perf_counter()
+            raw_files = self.collector.save_to_store(articles, sources=batch_sources)
+            # Le righe nuove si aggiungono ai dati salvati, senza riscrivere l'archivio
+            self.processor.process_batch(self.state, articles, raw_files)
+            self.state.save()
+            print(f"✅ Elaborati {len(articles)} articoli ({', '.join(batch_sources)}) in "
+                  f"{time.perf_counter() - start:.2f}s, coda {self.queue.qsize()}", flush=True)
+            if self.metrics_dir:
+                export_metrics(self.metrics_dir, action='daemon')
+        except Exception as e:
+            print(f"❌ Errore nell'elaborazione: {e}", flush=True)
+            # Articoli non salvati: i feed del lotto verranno raccolti di nuovo
+            self.collector.rollback(batch_sources)
+    
+    def run(self):
+        if self.state.is_new():
+            # Primo avvio: elabora l'archivio esistente prima di iniziare il polling
+            result = self.processor.process_full(self.state)
+            if result is not None:
+                df_processed, country_summary, timeline = result
+                self.processor.save_processed_data(self.processor.assign_stories(df_processed), country_summary, timeline)
+                self.state.save()
+        
+        self.schedule_feeds()
+        self.processing_thread.start()
+        # Primo giro subito, poi secondo gli intervalli
+        self.scheduler.run_all()
+        print("🟢 Daemon avviato, Ctrl+C per fermarlo", flush=True)
+        try:
+            while True:
+                self.scheduler.run_pending()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n👋 Arresto del daemon...")
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """Attende i download in corso ed elabora la coda prima di uscire"""
+        self.executor.shutdown(wait=True)
+        if self.processing_thread.is_alive():
+            # Dopo lo shutdown nessun download accoda altro: None chiude l'elaborazione
+            self.queue.put(None)
+            self.processing_thread.join()
+        close_alerts(self.processor.alerts)
+
 def generate_report():
     """Genera un report testuale"""
     try:
+        import math
+        from datetime import timedelta
         import pandas as pd
+        from article_index import ArticleIndex
+        from aggregate_state import AggregateState
+        from tension_indicators import TensionIndicators
         
         print("\n📊 Generazione report...")
         
-        # Carica i dati
-        articles = pd.read_csv('data/processed/articles_latest.csv')
-        countries = pd.read_csv('data/processed/country_summary_latest.csv')
-        timeline = pd.read_csv('data/processed/timeline_latest.csv')
+        # Statistiche, trend e articoli calcolati dall'indice, senza leggere l'intero archivio
+        index = ArticleIndex()
+        stats = index.stats()
+        countries = pd.read_parquet('data/processed/country_summary_latest.parquet')
+        
+        # Ultimi 7 giorni rispetto all'articolo più recente
+        week_start = (stats['latest'] - timedelta(days=6)).normalize() if stats['latest'] is not None else None
+        timeline = index.timeline(start=week_start)
         
         # Genera report
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -96,11 +380,11 @@ Generated: {timestamp}
 {'='*60}
 
 📊 SUMMARY STATISTICS
-- Total articles analyzed: {len(articles)}
+- Total articles analyzed: {stats['article_count']}
 - Countries monitored: {len(countries)}
-- Average global tension: {articles['enhanced_tension_score'].mean():.2f}/10
-- Peak tension score: {articles['enhanced_tension_score'].max():.2f}/10
-- Latest data: {pd.to_datetime(articles['published']).max()}
+- Average global tension: {stats['avg_tension']:.2f}/10
+- Peak tension score: {stats['max_tension']:.2f}/10
+- Latest data: {stats['latest']}
 
 🌍 TOP 10 COUNTRIES BY TENSION LEVEL
 """
@@ -115,12 +399,28 @@ Generated: {timestamp}
 - Trend direction: {'↗️ Rising' if timeline['avg_tension'].iloc[-1] > timeline['avg_tension'].iloc[0] else '↘️ Falling' if len(timeline) > 1 else '➡️ Stable'}
 - Peak day: {timeline.loc[timeline['max_tension'].idxmax(), 'date']} ({timeline['max_tension'].max():.2f}/10)
 
+⚡ ESCALATION INDICATORS (rolling means, EWMA baseline, z-score of the last hour)
+"""
+        
+        indicators = TensionIndicators.load(AggregateState.indicators_path('data/processed/aggregate_state.json')).snapshot()
+        for _, row in indicators.iterrows():
+            means = ' '.join(
+                f"{window} {row[f'mean_{window}']:.2f}" if pd.notna(row[f'mean_{window}']) else f"{window} -"
+                for window in ('1h', '6h', '24h', '7d')
+            )
+            zscore = f"{row['zscore']:+.2f}" if pd.notna(row['zscore']) else '-'
+            flag = "🚨" if row['anomaly'] else "  "
+            report += f"{flag} {row['country']:<15} {means} | EWMA {row['ewma']:.2f} | z {zscore}\n"
+        
+        report += f"""
 🔥 HIGH-TENSION ARTICLES (Score > 6.0)
 """
         
-        high_tension = articles[articles['enhanced_tension_score'] > 6.0].head(5)
+        # I 5 più recenti con punteggio > 6.0, direttamente dall'indice
+        high_tension = index.articles_between(min_score=math.nextafter(6.0, math.inf), limit=5)
+        index.close()
         for _, article in high_tension.iterrows():
-            countries_str = ', '.join(eval(article['countries']) if isinstance(article['countries'], str) else article['countries'])
+            countries_str = ', '.join(article['countries'])
             report += f"- [{article['enhanced_tension_score']:.1f}] {article['title'][:80]}...\n"
             report += f"  Countries: {countries_str}\n"
             report += f"  Source: {article['source']} | {pd.to_datetime(article['published']).strftime('%Y-%m-%d %H:%M')}\n\n"
@@ -153,7 +453,7 @@ def main():
     parser = argparse.ArgumentParser(description='Geopolitical Tensions Tracker')
     parser.add_argument(
         'action', 
-        choices=['collect', 'process', 'dashboard', 'report', 'all', 'setup'],
+        choices=['collect', 'process', 'dashboard', 'report', 'all', 'daemon', 'setup'],
         help='Azione da eseguire'
     )
     parser.add_argument(
@@ -162,18 +462,61 @@ def main():
         default=24, 
         help='Ore di dati da raccogliere (default: 24)'
     )
+    parser.add_argument(
+        '--jitter',
+        type=float,
+        default=0.2,
+        help="Con 'daemon': variazione casuale degli intervalli di polling (default: 0.2 = ±20%%)"
+    )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=4,
+        help="Con 'daemon': risultati di polling in attesa di elaborazione (default: 4)"
+    )
+    parser.add_argument(
+        '--no-checkpoint',
+        action='store_true',
+        help="Con 'all': non salva gli articoli grezzi, li passa direttamente all'elaborazione"
+    )
+    parser.add_argument(
+        '--metrics-dir',
+        default=None,
+        help="Con 'collect', 'all' e 'daemon': registra tempi e contatori e li salva in "
+             "questa directory (metrics.prom e run_summary.json)"
+    )
+    parser.add_argument(
+        '--fast-parser',
+        action='store_true',
+        help="Con 'collect', 'all' e 'daemon': legge i feed con lxml invece di feedparser "
+             "(feedparser resta il ripiego per i feed malformati)"
+    )
+    parser.add_argument(
+        '--alert',
+        action='append',
+        default=None,
+        metavar='SINK',
+        help="Con 'all' e 'daemon': invia gli avvisi a SINK ('stdout', URL di un webhook "
+             "o file JSONL); ripetibile"
+    )
     
     args = parser.parse_args()
     
     print("🌍 GEOPOLITICAL TENSIONS TRACKER")
     print("=" * 50)
     
+    if args.metrics_dir:
+        from instrumentation import enable_metrics
+        enable_metrics()
+    
     if args.action == 'setup':
         setup_environment()
         
     elif args.action == 'collect':
         setup_environment()
-        collect_data()
+        collect_data(hours_back=args.hours, fast_parser=args.fast_parser)
+        if args.metrics_dir:
+            export_metrics(args.metrics_dir, action='collect')
         
     elif args.action == 'process':
         if not os.path.exists('data/raw'):
@@ -182,33 +525,38 @@ def main():
         process_data()
         
     elif args.action == 'dashboard':
-        if not os.path.exists('data/processed/articles_latest.csv'):
+        if not os.path.exists('data/processed/articles'):
             print("❌ Nessun dato processato trovato. Esegui prima 'collect' e 'process'.")
             return
         run_dashboard()
         
     elif args.action == 'report':
-        if not os.path.exists('data/processed/articles_latest.csv'):
+        if not os.path.exists('data/processed/articles'):
             print("❌ Nessun dato processato trovato. Esegui prima 'collect' e 'process'.")
             return
         generate_report()
         
+    elif args.action == 'daemon':
+        setup_environment()
+        PipelineDaemon(hours_back=args.hours, jitter=args.jitter, queue_size=args.queue_size,
+                       metrics_dir=args.metrics_dir, alert_sinks=args.alert, fast_parser=args.fast_parser).run()
+        
     elif args.action == 'all':
         setup_environment()
         
-        if collect_data():
-            if process_data():
-                generate_report()
-                print(f"\n🎉 Pipeline completa eseguita con successo!")
-                print(f"💡 Esegui 'python run.py dashboard' per visualizzare i risultati")
-            else:
-                print("❌ Errore nell'elaborazione dei dati")
+        # Raccolta ed elaborazione nello stesso processo, dati passati in memoria
+        if run_pipeline(hours_back=args.hours, checkpoint=not args.no_checkpoint, alert_sinks=args.alert,
+                        fast_parser=args.fast_parser):
+            print(f"\n🎉 Pipeline completa eseguita con successo!")
+            print(f"💡 Esegui 'python run.py dashboard' per visualizzare i risultati")
         else:
-            print("❌ Errore nella raccolta dei dati")
+            print("❌ Errore nella pipeline")
+        if args.metrics_dir:
+            export_metrics(args.metrics_dir, action='all')
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
-        print("Uso: python run.py [collect|process|dashboard|report|all|setup]")
+        print("Uso: python run.py [collect|process|dashboard|report|all|daemon|setup]")
         print("\nEsempi:")
         print("  python run.py setup      # Configura l'ambiente")
         print("  python run.py collect    # Raccoglie i dati")
@@ -216,5 +564,6 @@ if __name__ == "__main__":
         print("  python run.py dashboard  # Avvia la dashboard")
         print("  python run.py report     # Genera report testuale")
         print("  python run.py all        # Esegue tutto il pipeline")
+        print("  python run.py daemon     # Polling continuo dei feed ed elaborazione")
     else:
         main()
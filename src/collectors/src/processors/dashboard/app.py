@@ -1,32 +1,91 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import os
 import sys
 
 # Aggiungi il path per importare i moduli
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from article_index import ARTICLE_INDEX, ArticleIndex
+from aggregate_state import AggregateState
+from tension_indicators import TensionIndicators
+
+# Rollup precalcolati dal processore (DataProcessor.create_rollups)
+ROLLUPS_DIR = 'data/processed/rollups'
+ROLLUPS = ['metrics', 'source_counts', 'heatmap', 'high_tension']
+
+# File prodotti dal processore: cambiano solo quando viene eseguita l'elaborazione
+PROCESSED_FILES = [
+    'data/processed/country_summary_latest.parquet',
+    'data/processed/timeline_latest.parquet'
+] + [os.path.join(ROLLUPS_DIR, f'{name}.parquet') for name in ROLLUPS]
+
+# Finestre temporali interrogate sull'indice degli articoli (None = dati precalcolati)
+TIME_WINDOWS = {
+    'All data': None,
+    'Last 24 hours': timedelta(hours=24),
+    'Last 7 days': timedelta(days=7),
+    'Last 30 days': timedelta(days=30)
+}
+
+def data_signature():
+    """Firma (inode, mtime, dimensione) dei dati processati"""
+    signature = []
+    for path in PROCESSED_FILES:
+        stat = os.stat(path)
+        signature.append((path, stat.st_ino, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+@st.cache_resource(max_entries=2, show_spinner="Loading processed data...")
+def _load_data_cached(signature):
+    """Legge i dati una volta per firma, condivisi tra riesecuzioni e utenti"""
+    rollups = {
+        name: pd.read_parquet(os.path.join(ROLLUPS_DIR, f'{name}.parquet'))
+        for name in ROLLUPS
+    }
+    countries = pd.read_parquet('data/processed/country_summary_latest.parquet')
+    timeline = pd.read_parquet('data/processed/timeline_latest.parquet')
+    
+    # Converti le date
+    timeline['date'] = pd.to_datetime(timeline['date'])
+    
+    return rollups, countries, timeline, datetime.now()
 
 def load_data():
-    """Carica i dati processati"""
+    """Carica i dati processati (dalla cache finché i file non cambiano)"""
+    render_start = datetime.now()
     try:
-        articles = pd.read_csv('data/processed/articles_latest.csv')
-        countries = pd.read_csv('data/processed/country_summary_latest.csv')
-        timeline = pd.read_csv('data/processed/timeline_latest.csv')
-        
-        # Converti le date
-        articles['published'] = pd.to_datetime(articles['published'])
-        timeline['date'] = pd.to_datetime(timeline['date'])
-        
-        return articles, countries, timeline
+        rollups, countries, timeline, loaded_at = _load_data_cached(data_signature())
     except FileNotFoundError:
         st.error("No processed data found. Please run the data collector and processor first.")
         return None, None, None
+    
+    if loaded_at < render_start:
+        st.sidebar.caption(f"⚡ Served from cache (loaded {loaded_at.strftime('%H:%M:%S')})")
+    else:
+        st.sidebar.caption("🔄 Data reloaded from disk")
+    
+    return rollups, countries, timeline
+
+def load_window(window):
+    """Paesi e articoli ad alta tensione dell'ultima finestra, dall'indice SQLite"""
+    with ArticleIndex(ARTICLE_INDEX) as index:
+        countries = index.country_summary(window)
+        high_tension = index.articles_between(start=datetime.now() - window, min_score=5, limit=10)
+    return countries, high_tension
+
+def load_indicators():
+    """Indicatori mobili per paese (TensionIndicators), aggiornati a ogni elaborazione"""
+    path = AggregateState.indicators_path('data/processed/aggregate_state.json')
+    return TensionIndicators.load(path).snapshot()
 
 def create_tension_gauge(avg_tension):
     """Crea un gauge per il livello di tensione globale"""
+    # plotly viene importato solo quando ci sono dati da mostrare
+    import plotly.graph_objects as go
+    
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
         value = avg_tension,
@@ -54,6 +113,8 @@ def create_tension_gauge(avg_tension):
 
 def create_country_chart(countries):
     """Crea un grafico a barre per i paesi"""
+    import plotly.express as px
+    
     fig = px.bar(
         countries.head(10), 
         x='country', 
@@ -73,6 +134,8 @@ def create_country_chart(countries):
 
 def create_timeline_chart(timeline):
     """Crea un grafico temporale"""
+    import plotly.graph_objects as go
+    
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -100,18 +163,37 @@ def create_timeline_chart(timeline):
     
     return fig
 
-def create_source_distribution(articles):
+def create_source_distribution(source_counts):
     """Crea un grafico della distribuzione delle fonti"""
-    source_counts = articles['source'].value_counts()
+    import plotly.express as px
     
     fig = px.pie(
-        values=source_counts.values,
-        names=source_counts.index,
+        values=source_counts['article_count'],
+        names=source_counts['source'],
         title='News Sources Distribution'
     )
     
     return fig
 
+def create_activity_heatmap(heatmap):
+    """Crea una heatmap della tensione media per giorno della settimana e ora"""
+    import plotly.express as px
+    
+    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    grid = heatmap.pivot(index='day_of_week', columns='hour', values='avg_tension')
+    grid = grid.reindex(index=range(7), columns=range(24))
+    
+    fig = px.imshow(
+        grid.values,
+        x=list(range(24)),
+        y=days,
+        color_continuous_scale='RdYlBu_r',
+        labels={'x': 'Hour', 'y': 'Day', 'color': 'Avg Tension'},
+        title='Average Tension by Day and Hour'
+    )
+    
+    return fig
+
 def main():
     st.set_page_config(
         page_title="Geopolitical Tensions Tracker",
@@ -123,23 +205,33 @@ def main():
     st.markdown("Real-time monitoring of global geopolitical tensions using open data sources")
     
     # Carica i dati
-    articles, countries, timeline = load_data()
+    rollups, countries, timeline = load_data()
     
-    if articles is None:
+    if rollups is None:
         st.stop()
     
+    high_tension_articles = rollups['high_tension'].head(10)
+    window_name = st.sidebar.selectbox("Time window", list(TIME_WINDOWS))
+    if TIME_WINDOWS[window_name] is not None:
+        try:
+            countries, high_tension_articles = load_window(TIME_WINDOWS[window_name])
+        except FileNotFoundError:
+            st.sidebar.warning("Article index not found: showing all data.")
+    
+    metrics = rollups['metrics'].iloc[0]
+    
     # Metriche principali
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric(
             "Total Articles",
-            len(articles),
+            int(metrics['article_count']),
             delta=f"Last 24h"
         )
     
     with col2:
-        avg_tension = articles['enhanced_tension_score'].mean()
+        avg_tension = metrics['avg_tension']
         st.metric(
             "Average Tension",
             f"{avg_tension:.2f}",
@@ -147,7 +239,7 @@ def main():
         )
     
     with col3:
-        max_tension = articles['enhanced_tension_score'].max()
+        max_tension = metrics['max_tension']
         st.metric(
             "Peak Tension",
             f"{max_tension:.2f}",
@@ -191,19 +283,36 @@ def main():
             
             # Distribuzione delle fonti
             st.subheader("News Sources")
-            fig_sources = create_source_distribution(articles)
+            fig_sources = create_source_distribution(rollups['source_counts'])
             st.plotly_chart(fig_sources, use_container_width=True)
     
+    # Indicatori mobili e anomalie per paese
+    indicators = load_indicators()
+    if not indicators.empty:
+        st.subheader("Escalation Indicators")
+        escalating = indicators.loc[indicators['anomaly'], 'country'].tolist()
+        if escalating:
+            st.warning("Escalation detected: " + ', '.join(escalating))
+        st.dataframe(
+            indicators[['country', 'mean_1h', 'mean_6h', 'mean_24h', 'mean_7d', 'ewma', 'zscore', 'anomaly']],
+            use_container_width=True
+        )
+    
+    # Attività per giorno della settimana e ora
+    if not rollups['heatmap'].empty:
+        st.subheader("Activity Heatmap")
+        fig_heatmap = create_activity_heatmap(rollups['heatmap'])
+        st.plotly_chart(fig_heatmap, use_container_width=True)
+    
     # Articoli recenti con alta tensione
     st.subheader("Recent High-Tension Articles")
-    high_tension_articles = articles[articles['enhanced_tension_score'] >= 5].head(10)
     
     if not high_tension_articles.empty:
         for _, article in high_tension_articles.iterrows():
             with st.expander(f"[{article['enhanced_tension_score']:.1f}] {article['title'][:100]}..."):
                 st.write(f"**Source:** {article['source']}")
                 st.write(f"**Published:** {article['published'].strftime('%Y-%m-%d %H:%M')}")
-                st.write(f"**Countries:** {', '.join(eval(article['countries']) if isinstance(article['countries'], str) else article['countries'])}")
+                st.write(f"**Countries:** {', '.join(article['countries'])}")
                 st.write(f"**Description:** {article['description'][:300]}...")
                 st.write(f"**Link:** {article['link']}")
     else:
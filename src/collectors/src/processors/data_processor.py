@@ -1,12 +1,42 @@
+import numpy as np
 import pandas as pd
 import json
 import os
+import sys
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
+import argparse
 import glob
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+
+# Aggiungi il path per importare i moduli condivisi con il collector
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from keyword_matcher import country_aliases, get_matcher
+from aggregate_state import AggregateState
+from instrumentation import timed_stage
+from story_clustering import lsh_clusters, minhash_signatures
+import article_store
+import article_index
+from article_record import articles_to_frame
 
 class DataProcessor:
-    def __init__(self):
+    # Sotto questa soglia il punteggio resta nel processo principale
+    parallel_min_rows = 20000
+    
+    def __init__(self, word_boundary: bool = False, workers: int = 1):
+        # True: conta solo parole intere ("warning" non vale come "war")
+        self.word_boundary = word_boundary
+        # Processi per il punteggio dei frame grandi (1 = tutto nel processo principale)
+        self.workers = workers
+        self._pool = None
+        # Regole di allerta (alerting.AlertEngine) valutate sugli articoli nuovi
+        self.alerts = None
+        self._matcher_for = None
+        self._keyword_matcher = None
+        
         self.country_keywords = {
             'Russia': ['russia', 'moscow', 'putin', 'kremlin', 'russian'],
             'Ukraine': ['ukraine', 'kyiv', 'kiev', 'zelensky', 'ukrainian'],
@@ -35,22 +65,53 @@ class DataProcessor:
             'protest': 1.5,
             'diplomacy': 1.0
         }
+        
+        # Bonus per combinazioni di parole critiche
+        self.critical_combinations = [
+            ('military', 'action'),
+            ('nuclear', 'threat'),
+            ('border', 'conflict'),
+            ('economic', 'sanctions'),
+            ('diplomatic', 'crisis')
+        ]
+    
+    def close(self):
+        """Chiude il pool di processi, se è stato avviato"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
     
-    def load_latest_data(self) -> pd.DataFrame:
-        """Carica i dati più recenti da tutti i file JSON"""
-        json_files = glob.glob('data/raw/news_*.json')
+    def raw_files(self) -> List[str]:
+        """File grezzi disponibili: JSON storici e file dell'archivio Parquet"""
+        return sorted(glob.glob('data/raw/news_*.json')) + article_store.raw_files()
+    
+    @timed_stage('load', rows='output')
+    def load_latest_data(self, raw_files: List[str] = None) -> pd.DataFrame:
+        """Carica i dati più recenti da tutti i file grezzi (o solo da raw_files)"""
+        if raw_files is None:
+            raw_files = self.raw_files()
         
-        if not json_files:
+        if not raw_files:
             print("No data files found!")
             return pd.DataFrame()
         
+        frames = []
+        json_files = [file for file in raw_files if file.endswith('.json')]
+        parquet_files = [file for file in raw_files if file.endswith('.parquet')]
+        
         all_articles = []
         for file in json_files:
             with open(file, 'r', encoding='utf-8') as f:
                 articles = json.load(f)
                 all_articles.extend(articles)
+        if all_articles:
+            frames.append(pd.DataFrame(all_articles))
         
-        df = pd.DataFrame(all_articles)
+        if parquet_files:
+            stored = article_store.read_articles(article_store.RAW_STORE, files=parquet_files)
+            frames.append(stored.drop(columns=['date']))
+        
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         if not df.empty:
             df['published'] = pd.to_datetime(df['published'])
             df = df.sort_values('published', ascending=False)
@@ -59,60 +120,262 @@ class DataProcessor:
         
         return df
     
-    def identify_countries(self, text: str) -> List[str]:
-        """Identifica i paesi menzionati nel testo"""
-        text_lower = text.lower()
-        mentioned_countries = []
+    def archive_processed_articles(self) -> int:
+        """Copia nell'archivio grezzo gli articoli presenti solo nei dati processati; restituisce quanti"""
+        # Le esecuzioni senza checkpoint salvano gli articoli raccolti solo nei
+        # dati processati: una ricostruzione dai file grezzi li perderebbe
+        if not os.path.isdir(article_store.PROCESSED_STORE):
+            return 0
+        archived = [
+            self._version_digests(frame)
+            for frame in self._iter_raw_frames(self.raw_files(), 100_000, ['source', 'title', 'published'])
+        ]
+        archived = np.unique(np.concatenate(archived)) if archived else np.zeros(0, dtype=np.uint64)
         
-        for country, keywords in self.country_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    mentioned_countries.append(country)
-                    break
+        copied = 0
+        for table in article_store.processed_batches(article_store.RAW_SCHEMA.names):
+            missing = ~np.isin(self._version_digests(table.select(['source', 'title', 'published']).to_pandas()), archived)
+            if missing.any():
+                article_store.write_raw_table(table.filter(pa.array(missing)))
+                copied += int(missing.sum())
+        if copied:
+            print(f"Archived {copied} articles found only in the processed data")
+        return copied
+    
+    @staticmethod
+    def _version_digests(frame: pd.DataFrame) -> np.ndarray:
+        """Hash di fonte, titolo e data di pubblicazione di ogni articolo"""
+        published = pd.to_datetime(frame['published']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        keys = (frame['source'] + '\x1f' + frame['title']).to_numpy(dtype=object)
+        return pd.util.hash_array(keys) ^ pd.util.hash_array(published)
+    
+    def _iter_raw_frames(self, raw_files: List[str], rows_per_batch: int,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Legge i file grezzi un blocco alla volta, nell'ordine dei file"""
+        position = 0
         
-        return list(set(mentioned_countries))  # Rimuovi duplicati
+        for file in raw_files:
+            if file.endswith('.json'):
+                with open(file, 'r', encoding='utf-8') as f:
+                    file_frame = pd.DataFrame(json.load(f))
+                if file_frame.empty:
+                    continue
+                if columns is not None:
+                    file_frame = file_frame[columns]
+                # Nome distinto da `frame` sotto: il generatore legge file_frame solo quando avanza
+                frames = (
+                    file_frame.iloc[start:start + rows_per_batch]
+                    for start in range(0, len(file_frame), rows_per_batch)
+                )
+            else:
+                dataset = article_store.raw_dataset([file])
+                frames = (
+                    batch.to_pandas()
+                    for batch in dataset.to_batches(columns=columns, batch_size=rows_per_batch)
+                    if batch.num_rows
+                )
+            
+            for frame in frames:
+                frame = frame.reset_index(drop=True)
+                frame['_position'] = np.arange(position, position + len(frame))
+                position += len(frame)
+                yield frame
     
-    def enhanced_tension_score(self, text: str) -> float:
-        """Calcola un punteggio di tensione più sofisticato"""
-        text_lower = text.lower()
+    def iter_latest_data(self, raw_files: List[str] = None, hours_back: Optional[int] = None,
+                         max_memory_mb: float = 256) -> Iterator[pd.DataFrame]:
+        """Versione a flusso di load_latest_data, a lotti di circa max_memory_mb"""
+        if raw_files is None:
+            raw_files = self.raw_files()
+        cutoff = pd.Timestamp(datetime.now() - timedelta(hours=hours_back)) if hours_back else None
+        
+        def in_window(published: pd.Series) -> np.ndarray:
+            if cutoff is None:
+                return np.ones(len(published), dtype=bool)
+            return (published >= cutoff).to_numpy()
+        
+        # Primo passaggio: solo le chiavi, per scegliere la versione più recente
+        key_rows = max(10_000, int(max_memory_mb * 2**20 / 200))
+        digests, published_ns, positions = [], [], []
+        for frame in self._iter_raw_frames(raw_files, key_rows, ['source', 'title', 'published']):
+            published = pd.to_datetime(frame['published'])
+            keep = in_window(published)
+            digests.append(pd.util.hash_array((frame['source'] + '\x1f' + frame['title']).to_numpy(dtype=object))[keep])
+            published_ns.append(published.to_numpy(dtype='datetime64[ns]').astype(np.int64)[keep])
+            positions.append(frame['_position'].to_numpy()[keep])
+        
+        if not digests:
+            return
+        
+        digests = np.concatenate(digests)
+        published_ns = np.concatenate(published_ns)
+        positions = np.concatenate(positions)
+        
+        # Per ogni chiave: il più recente, a parità di data il primo letto
+        order = np.lexsort((positions, -published_ns, digests))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = digests[order][1:] != digests[order][:-1]
+        winners = np.sort(positions[order][first])
+        del digests, published_ns, positions, order, first
+        
+        # Secondo passaggio: righe complete, a lotti dimensionati sulla memoria
+        rows_per_batch = None
+        pending, pending_rows = [], 0
+        sample = self._iter_raw_frames(raw_files, 1000)
+        for frame in sample:
+            bytes_per_row = max(1, frame.memory_usage(deep=True).sum() / len(frame))
+            # Margine per le colonne aggiunte da process_articles
+            rows_per_batch = max(1000, int(max_memory_mb * 2**20 / (bytes_per_row * 4)))
+            break
+        sample.close()
+        if rows_per_batch is None:
+            return
+        
+        for frame in self._iter_raw_frames(raw_files, rows_per_batch):
+            index = np.searchsorted(winners, frame['_position'].to_numpy())
+            index[index == len(winners)] = 0
+            frame = frame[winners[index] == frame['_position'].to_numpy()]
+            if frame.empty:
+                continue
+            
+            pending.append(frame.drop(columns=['_position']))
+            pending_rows += len(frame)
+            if pending_rows >= rows_per_batch:
+                yield self._prepare_batch(pending)
+                pending, pending_rows = [], 0
+        
+        if pending:
+            yield self._prepare_batch(pending)
+    
+    @staticmethod
+    def _prepare_batch(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        df = pd.concat(frames, ignore_index=True)
+        df['published'] = pd.to_datetime(df['published'])
+        if 'date' in df:
+            df = df.drop(columns=['date'])
+        return df
+    
+    def _matcher(self):
+        """Matcher unico per paesi, parole ponderate e combinazioni critiche"""
+        # Ricostruito solo se i vocabolari sono stati sostituiti dopo l'ultima chiamata
+        vocabularies = (self.country_keywords, self.severity_weights, self.critical_combinations, self.word_boundary)
+        if self._matcher_for is None or any(a is not b for a, b in zip(vocabularies, self._matcher_for)):
+            self._matcher_for = vocabularies
+            self._keyword_matcher = get_matcher(
+                country_aliases(self.country_keywords),
+                self.severity_weights,
+                [word for combo in self.critical_combinations for word in combo],
+                word_boundary=self.word_boundary
+            )
+            # Alias -> posizioni dei paesi in country_keywords, per _countries_from_hits
+            self._alias_countries = {}
+            for position, keywords in enumerate(self.country_keywords.values()):
+                for keyword in keywords:
+                    self._alias_countries.setdefault(keyword.lower(), []).append(position)
+        return self._keyword_matcher
+    
+    def _countries_from_hits(self, hits) -> List[str]:
+        # Nell'ordine di country_keywords; _alias_countries viene da _matcher()
+        found = {position for hit in hits for position in self._alias_countries.get(hit, ())}
+        countries = list(self.country_keywords)
+        return [countries[position] for position in sorted(found)]
+    
+    def _score_from_hits(self, hits) -> float:
         score = 0
         
         # Punteggio basato su parole chiave ponderate
         for keyword, weight in self.severity_weights.items():
-            if keyword in text_lower:
+            if keyword in hits:
                 score += weight
         
-        # Bonus per combinazioni di parole critiche
-        critical_combinations = [
-            ('military', 'action'),
-            ('nuclear', 'threat'),
-            ('border', 'conflict'),
-            ('economic', 'sanctions'),
-            ('diplomatic', 'crisis')
-        ]
-        
-        for combo in critical_combinations:
-            if all(word in text_lower for word in combo):
+        for combo in self.critical_combinations:
+            if all(word in hits for word in combo):
                 score += 2.0
         
         # Normalizza il punteggio (0-10)
         return min(10.0, round(score, 2))
     
+    def identify_countries(self, text: str) -> List[str]:
+        """Identifica i paesi menzionati nel testo"""
+        return self._countries_from_hits(self._matcher().find(text))
+    
+    def enhanced_tension_score(self, text: str) -> float:
+        """Calcola un punteggio di tensione più sofisticato"""
+        return self._score_from_hits(self._matcher().find(text))
+    
+    def analyze_text(self, text: str) -> Tuple[List[str], float]:
+        """Paesi e punteggio di tensione con una sola scansione del testo"""
+        hits = self._matcher().find(text)
+        return self._countries_from_hits(hits), self._score_from_hits(hits)
+    
+    def score_batch(self, titles: pd.Series, descriptions: pd.Series) -> pd.DataFrame:
+        """Calcola countries e enhanced_tension_score per intere colonne"""
+        if self.workers > 1 and len(titles) >= self.parallel_min_rows:
+            masks, score = self._score_parallel(titles, descriptions)
+        else:
+            masks, score = self._score_arrays(titles, descriptions)
+        
+        return pd.DataFrame({
+            'countries': article_store.decode_countries(masks, list(self.country_keywords)),
+            'enhanced_tension_score': score
+        }, index=titles.index)
+    
+    def _score_parallel(self, titles: pd.Series, descriptions: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Punteggio a blocchi in un pool di processi"""
+        if self._pool is None:
+            config = (self.word_boundary, self.country_keywords, self.severity_weights, self.critical_combinations)
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_score_worker, initargs=config)
+        
+        # Più blocchi che processi, per bilanciare il carico
+        bounds = np.linspace(0, len(titles), self.workers * 2 + 1, dtype=np.int64)
+        shards = [
+            pa.table({
+                'title': pa.array(titles.iloc[start:stop].fillna('').astype(str), pa.string()),
+                'description': pa.array(descriptions.iloc[start:stop].fillna('').astype(str), pa.string())
+            })
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        results = list(self._pool.map(_score_shard, shards))
+        return np.concatenate([masks for masks, _ in results]), np.concatenate([score for _, score in results])
+    
+    def _score_arrays(self, titles: pd.Series, descriptions: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Bitmask dei paesi (bit i = i-esimo paese di country_keywords) e punteggio per articolo"""
+        text = (titles.fillna('').astype(str) + ' ' + descriptions.fillna('').astype(str)).tolist()
+        
+        # Tutto il vocabolario in una sola passata sui testi (vedi KeywordMatcher.masks)
+        matcher = self._matcher()
+        hits = matcher.masks(text)
+        column = {term: i for i, term in enumerate(matcher.terms)}
+        
+        # Paesi: OR sugli alias di ciascun paese
+        countries = list(self.country_keywords)
+        country_masks = np.column_stack([
+            hits[:, [column[keyword.lower()] for keyword in keywords]].any(axis=1)
+            for keywords in self.country_keywords.values()
+        ]) if countries else np.zeros((len(text), 0), dtype=bool)
+        
+        # Punteggio: parole ponderate + bonus per combinazioni critiche
+        keywords = list(self.severity_weights)
+        weights = np.array([self.severity_weights[keyword] for keyword in keywords], dtype=float)
+        score = hits[:, [column[keyword.lower()] for keyword in keywords]].astype(float) @ weights
+        
+        for combo in self.critical_combinations:
+            score += 2.0 * hits[:, [column[word.lower()] for word in combo]].all(axis=1)
+        
+        score = np.minimum(10.0, np.round(score, 2))
+        
+        masks = country_masks.astype(np.int64) @ (np.int64(1) << np.arange(len(countries), dtype=np.int64))
+        return masks, score
+    
+    @timed_stage('score')
     def process_articles(self, df: pd.DataFrame) -> pd.DataFrame:
         """Processa gli articoli per l'analisi"""
         if df.empty:
             return df
         
-        # Aggiungi colonne per analisi
-        df['countries'] = df.apply(
-            lambda row: self.identify_countries(row['title'] + ' ' + row['description']), 
-            axis=1
-        )
-        
-        df['enhanced_tension_score'] = df.apply(
-            lambda row: self.enhanced_tension_score(row['title'] + ' ' + row['description']),
-            axis=1
-        )
+        # Aggiungi colonne per analisi (calcolo vettoriale sull'intero frame)
+        scores = self.score_batch(df['title'], df['description'])
+        df['countries'] = scores['countries']
+        df['enhanced_tension_score'] = scores['enhanced_tension_score']
         
         # Aggiungi informazioni temporali
         df['hour'] = df['published'].dt.hour
@@ -121,23 +384,53 @@ class DataProcessor:
         
         return df
     
+    @timed_stage('stories')
+    def assign_stories(self, df: pd.DataFrame, num_perm: int = 64, bands: int = 16,
+                       threshold: float = 0.5) -> pd.DataFrame:
+        """Raggruppa gli articoli sulla stessa notizia (colonna story_id)"""
+        if df.empty:
+            return df
+        
+        texts = (df['title'].fillna('').astype(str) + ' ' + df['description'].fillna('').astype(str)).tolist()
+        signatures = minhash_signatures(texts, num_perm=num_perm)
+        df['story_id'] = lsh_clusters(signatures, bands=bands, threshold=threshold)
+        return df
+    
+    def collapse_stories(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Una riga per notizia: paesi uniti, tensione media, pubblicazione più recente"""
+        if df.empty:
+            return pd.DataFrame()
+        
+        ordered = df.sort_values('published', ascending=False)
+        stories = ordered.groupby('story_id', sort=True).agg(
+            title=('title', 'first'),
+            published=('published', 'max'),
+            enhanced_tension_score=('enhanced_tension_score', 'mean'),
+            article_count=('title', 'size'),
+            source_count=('source', 'nunique')
+        )
+        stories['enhanced_tension_score'] = stories['enhanced_tension_score'].round(2)
+        
+        mentions = ordered[['story_id', 'countries']].explode('countries').dropna().drop_duplicates()
+        countries = mentions.groupby('story_id')['countries'].agg(list)
+        stories['countries'] = countries.reindex(stories.index).map(
+            lambda value: value if isinstance(value, list) else []
+        )
+        stories['date'] = stories['published'].dt.date
+        return stories.reset_index()
+    
+    @timed_stage('country_summary')
     def create_country_summary(self, df: pd.DataFrame) -> pd.DataFrame:
         """Crea un riassunto per paese"""
         if df.empty:
             return pd.DataFrame()
         
         # Espandi le righe per paese (un articolo può menzionare più paesi)
-        country_rows = []
-        for _, row in df.iterrows():
-            for country in row['countries']:
-                country_row = row.copy()
-                country_row['country'] = country
-                country_rows.append(country_row)
-        
-        if not country_rows:
-            return pd.DataFrame()
+        country_df = df[['countries', 'enhanced_tension_score', 'published']].explode('countries')
+        country_df = country_df.dropna(subset=['countries']).rename(columns={'countries': 'country'})
         
-        country_df = pd.DataFrame(country_rows)
+        if country_df.empty:
+            return pd.DataFrame()
         
         # Raggruppa per paese
         country_summary = country_df.groupby('country').agg({
@@ -152,6 +445,7 @@ class DataProcessor:
         
         return country_summary
     
+    @timed_stage('timeline')
     def create_timeline(self, df: pd.DataFrame) -> pd.DataFrame:
         """Crea una timeline delle tensioni"""
         if df.empty:
@@ -169,42 +463,369 @@ class DataProcessor:
         
         return timeline
     
+    @timed_stage('rollups')
+    def create_rollups(self, df: pd.DataFrame, high_tension_limit: int = 50) -> Dict[str, pd.DataFrame]:
+        """Aggregati compatti per la dashboard, di dimensione indipendente dall'archivio"""
+        score = df['enhanced_tension_score']
+        metrics = pd.DataFrame([{
+            'article_count': len(df),
+            'tension_sum': float(score.sum()),
+            'max_tension': float(score.max()) if len(df) else 0.0,
+            'latest_published': df['published'].max() if len(df) else pd.NaT
+        }])
+        
+        source_counts = df.groupby('source').size().rename('article_count').reset_index()
+        
+        heatmap = df.groupby(['day_of_week', 'hour'])['enhanced_tension_score'].agg(
+            article_count='size', tension_sum='sum'
+        ).reset_index()
+        
+        columns = ['source', 'title', 'description', 'link', 'published', 'countries', 'enhanced_tension_score']
+        high_tension = self._most_recent(df.loc[score >= 5, columns], high_tension_limit)
+        high_tension = high_tension.assign(description=high_tension['description'].str.slice(0, 300))
+        
+        return self._finish_rollups({
+            'metrics': metrics,
+            'source_counts': source_counts,
+            'heatmap': heatmap,
+            'high_tension': high_tension
+        })
+    
+    def merge_rollups(self, left: Dict[str, pd.DataFrame], right: Dict[str, pd.DataFrame],
+                      high_tension_limit: int = 50) -> Dict[str, pd.DataFrame]:
+        """Combina i rollup di due insiemi disgiunti di articoli"""
+        metrics = pd.concat([left['metrics'], right['metrics']])
+        merged_metrics = pd.DataFrame([{
+            'article_count': metrics['article_count'].sum(),
+            'tension_sum': metrics['tension_sum'].sum(),
+            'max_tension': metrics['max_tension'].max(),
+            'latest_published': metrics['latest_published'].max()
+        }])
+        
+        source_counts = pd.concat([left['source_counts'], right['source_counts']])
+        source_counts = source_counts.groupby('source')['article_count'].sum().reset_index()
+        
+        heatmap = pd.concat([left['heatmap'], right['heatmap']])
+        heatmap = heatmap.groupby(['day_of_week', 'hour'])[['article_count', 'tension_sum']].sum().reset_index()
+        
+        high_tension = pd.concat([left['high_tension'], right['high_tension']])
+        high_tension = self._most_recent(high_tension, high_tension_limit)
+        
+        return self._finish_rollups({
+            'metrics': merged_metrics,
+            'source_counts': source_counts,
+            'heatmap': heatmap,
+            'high_tension': high_tension
+        })
+    
+    @staticmethod
+    def _most_recent(df: pd.DataFrame, limit: int) -> pd.DataFrame:
+        """I `limit` articoli più recenti, con ordine deterministico a parità di data"""
+        return df.sort_values(
+            ['published', 'source', 'title'], ascending=[False, True, True], kind='stable'
+        ).head(limit)
+    
+    @staticmethod
+    def _finish_rollups(rollups: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        metrics = rollups['metrics']
+        metrics['avg_tension'] = metrics['tension_sum'] / metrics['article_count'].where(metrics['article_count'] > 0)
+        heatmap = rollups['heatmap']
+        heatmap['avg_tension'] = (heatmap['tension_sum'] / heatmap['article_count']).round(2)
+        rollups['source_counts'] = rollups['source_counts'].sort_values('article_count', ascending=False)
+        return rollups
+    
+    def save_rollups(self, rollups: Dict[str, pd.DataFrame], directory: str = 'data/processed/rollups'):
+        """Salva i rollup, un file Parquet ciascuno"""
+        os.makedirs(directory, exist_ok=True)
+        for name, rollup in rollups.items():
+            rollup.to_parquet(os.path.join(directory, f'{name}.parquet'), index=False)
+    
+    def process_full(self, state: AggregateState, df_new=None):
+        """Ricalcola tutto dai file grezzi e ricostruisce lo stato"""
+        self.archive_processed_articles()
+        raw_files = self.raw_files()
+        df = self.load_latest_data(raw_files)
+        if df_new is not None and len(df_new):
+            if not isinstance(df_new, pd.DataFrame):
+                df_new = articles_to_frame(df_new)
+            df_new = df_new.assign(published=pd.to_datetime(df_new['published']))
+            df = pd.concat([df_new, df], ignore_index=True) if not df.empty else df_new
+            df = df.sort_values('published', ascending=False)
+            df = df.drop_duplicates(subset=['title', 'source'])
+        if df.empty:
+            return None
+        
+        df_processed = self.process_articles(df)
+        country_summary = self.create_country_summary(df_processed)
+        timeline = self.create_timeline(df_processed)
+        
+        # Ricostruisci lo stato per le prossime esecuzioni incrementali
+        state.reset()
+        accepted = state.update(df_processed, raw_files)
+        # Le regole guardano solo gli articoli recenti e non ripetono gli avvisi già inviati
+        self.evaluate_alerts(state, accepted)
+        return df_processed, country_summary, timeline
+    
+    def process_incremental(self, state: AggregateState, df_new=None,
+                            new_files: List[str] = None):
+        """Elabora solo gli articoli nuovi e aggiorna lo stato persistente"""
+        if df_new is None:
+            new_files = state.new_files(self.raw_files())
+            if not new_files:
+                return None
+            print(f"Incremental run: {len(new_files)} new raw files")
+            df_new = self.load_latest_data(new_files)
+        else:
+            df_new = self._new_frame(df_new)
+        df_new = self._update_state(state, df_new, new_files or [])
+        
+        # Unisci con gli articoli già processati nelle esecuzioni precedenti
+        df = self._merge_processed(df_new)
+        if df.empty:
+            return None
+        return df, state.country_summary(), state.timeline()
+    
+    def process_batch(self, state: AggregateState, articles, new_files: List[str]) -> int:
+        """Elabora e salva un lotto del daemon; restituisce gli articoli entrati nello stato"""
+        df_new = self._new_frame(articles)
+        known = state.known(df_new) if not df_new.empty else np.zeros(0, dtype=bool)
+        df_new = self._update_state(state, df_new, new_files)
+        if df_new.empty:
+            return 0
+        
+        country_summary, timeline = state.country_summary(), state.timeline()
+        # Articoli ripubblicati sostituiscono righe già salvate: serve l'istantanea completa
+        replaces = known[df_new.index.to_numpy()].any()
+        if replaces or not self.append_processed_data(df_new, country_summary, timeline):
+            df = self.assign_stories(self._merge_processed(df_new))
+            self.save_processed_data(df, country_summary, timeline)
+        return len(df_new)
+    
+    @staticmethod
+    def _new_frame(df_new) -> pd.DataFrame:
+        """Articoli nuovi (record del collector o DataFrame), senza duplicati"""
+        if not isinstance(df_new, pd.DataFrame):
+            # Record del collector: conversione in blocco, published è già una data
+            df_new = articles_to_frame(df_new)
+        elif not df_new.empty:
+            df_new = df_new.copy()
+            df_new['published'] = pd.to_datetime(df_new['published'])
+        if df_new.empty:
+            return df_new
+        df_new = df_new.sort_values('published', ascending=False)
+        return df_new.drop_duplicates(subset=['title', 'source']).reset_index(drop=True)
+    
+    def _update_state(self, state: AggregateState, df_new: pd.DataFrame, new_files: List[str]) -> pd.DataFrame:
+        """Calcola i punteggi e aggiorna lo stato; restituisce le righe entrate"""
+        if not df_new.empty:
+            df_new = self.process_articles(df_new)
+        df_new = state.update(df_new, new_files) if not df_new.empty else df_new
+        # Subito dopo il punteggio: gli avvisi partono prima del salvataggio
+        self.evaluate_alerts(state, df_new)
+        state.files.extend(file for file in new_files if file not in state.files)
+        return df_new
+    
+    def evaluate_alerts(self, state: AggregateState, df: pd.DataFrame):
+        """Applica le regole di allerta (se configurate) agli articoli entrati nello stato"""
+        if self.alerts is not None and not df.empty:
+            self.alerts.evaluate(df, state.indicators)
+    
+    def _merge_processed(self, df_new: pd.DataFrame) -> pd.DataFrame:
+        df = self.load_processed_articles()
+        if not df_new.empty:
+            df = pd.concat([df_new, df], ignore_index=True) if not df.empty else df_new
+            df = df.sort_values('published', ascending=False)
+            df = df.drop_duplicates(subset=['title', 'source'])
+        return df
+    
+    def load_processed_articles(self, base_dir: str = article_store.PROCESSED_STORE) -> pd.DataFrame:
+        """Rilegge gli articoli già processati, senza ricalcolarne i punteggi"""
+        return article_store.read_articles(base_dir)
+    
+    @timed_stage('save')
     def save_processed_data(self, df: pd.DataFrame, country_summary: pd.DataFrame, timeline: pd.DataFrame):
         """Salva i dati processati"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        os.makedirs('data/processed', exist_ok=True)
         
-        # Salva i dati processati
-        df.to_csv(f'data/processed/articles_{timestamp}.csv', index=False)
-        country_summary.to_csv(f'data/processed/country_summary_{timestamp}.csv', index=False)
-        timeline.to_csv(f'data/processed/timeline_{timestamp}.csv', index=False)
+        # Articoli nell'archivio Parquet, tabelle riassuntive come file Parquet singoli
+        article_store.write_processed_articles(df, list(self.country_keywords))
+        # Indice SQLite per le interrogazioni su finestre temporali (article_index)
+        article_index.write_article_index(df, list(self.country_keywords))
+        self.save_summaries(country_summary, timeline)
+        self.save_rollups(self.create_rollups(df))
         
-        # Salva anche la versione "latest" per facile accesso
-        df.to_csv('data/processed/articles_latest.csv', index=False)
-        country_summary.to_csv('data/processed/country_summary_latest.csv', index=False)
-        timeline.to_csv('data/processed/timeline_latest.csv', index=False)
+        # Aggregati per notizia (articoli quasi duplicati contati una volta)
+        if 'story_id' in df:
+            stories = self.collapse_stories(df)
+            story_summary = self.create_country_summary(stories).rename(columns={'article_count': 'story_count'})
+            stories.to_parquet('data/processed/stories_latest.parquet', index=False)
+            story_summary.to_parquet('data/processed/country_summary_stories_latest.parquet', index=False)
         
         print(f"Processed data saved:")
         print(f"- Articles: {len(df)}")
+        if 'story_id' in df:
+            print(f"- Stories: {df['story_id'].nunique()}")
         print(f"- Countries: {len(country_summary)}")
         print(f"- Timeline entries: {len(timeline)}")
+    
+    @timed_stage('save')
+    def append_processed_data(self, df_new: pd.DataFrame, country_summary: pd.DataFrame, timeline: pd.DataFrame,
+                              story_window: timedelta = timedelta(hours=48)) -> bool:
+        """Aggiunge articoli nuovi ai dati salvati senza riscriverli; False se manca qualcosa da estendere"""
+        stories_path = 'data/processed/stories_latest.parquet'
+        rollups = self.load_rollups()
+        if (rollups is None or not os.path.exists(stories_path)
+                or not os.path.isdir(article_store.PROCESSED_STORE)
+                or not os.path.exists(article_index.ARTICLE_INDEX)):
+            return False
+        with article_index.ArticleIndex() as index:
+            if index.country_names != list(self.country_keywords):
+                return False
+        
+        stories = pd.read_parquet(stories_path)
+        next_id = int(stories['story_id'].max()) + 1 if len(stories) else 0
+        df_new = self.assign_window_stories(df_new, story_window, next_id)
+        article_store.append_processed_articles(df_new, list(self.country_keywords))
+        article_index.append_article_index(df_new)
+        self.save_summaries(country_summary, timeline)
+        self.save_rollups(self.merge_rollups(rollups, self.create_rollups(df_new)))
+        
+        # Ricalcola solo le notizie toccate dal lotto, con tutti i loro articoli
+        touched = df_new['story_id'].unique().tolist()
+        with article_index.ArticleIndex() as index:
+            updated = self.collapse_stories(index.story_articles(touched))
+        stories = pd.concat([stories[~stories['story_id'].isin(touched)], updated], ignore_index=True)
+        stories = stories.sort_values('story_id').reset_index(drop=True)
+        story_summary = self.create_country_summary(stories).rename(columns={'article_count': 'story_count'})
+        stories.to_parquet(stories_path, index=False)
+        story_summary.to_parquet('data/processed/country_summary_stories_latest.parquet', index=False)
+        
+        print(f"Processed data appended: {len(df_new)} articles, {len(touched)} stories")
+        return True
+    
+    @timed_stage('stories')
+    def assign_window_stories(self, df_new: pd.DataFrame, window: timedelta, next_id: int,
+                              num_perm: int = 64, bands: int = 16, threshold: float = 0.5) -> pd.DataFrame:
+        """story_id per articoli nuovi, confrontati solo con gli articoli salvati entro `window`"""
+        columns = ['title', 'description', 'published', 'story_id']
+        stored = article_store.read_articles(columns=columns, start=df_new['published'].min() - window)
+        stored = stored.dropna(subset=['story_id'])
+        frame = pd.concat([stored[columns], df_new[columns[:3]]], ignore_index=True)
+        
+        texts = (frame['title'].fillna('').astype(str) + ' ' + frame['description'].fillna('').astype(str)).tolist()
+        labels = lsh_clusters(minhash_signatures(texts, num_perm=num_perm), bands=bands, threshold=threshold)
+        # Gruppi con articoli salvati: la notizia esistente (id minore); altri: id nuovi
+        existing = frame['story_id'].astype('float64').groupby(labels).transform('min')
+        story_ids = existing.to_numpy()[len(stored):].copy()
+        missing = np.isnan(story_ids)
+        story_ids[missing] = next_id + pd.factorize(labels[len(stored):][missing])[0]
+        return df_new.assign(story_id=story_ids.astype(np.int64))
+    
+    def load_rollups(self, directory: str = 'data/processed/rollups') -> Optional[Dict[str, pd.DataFrame]]:
+        """Rollup salvati, None se ne manca qualcuno"""
+        paths = {name: os.path.join(directory, f'{name}.parquet')
+                 for name in ['metrics', 'source_counts', 'heatmap', 'high_tension']}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        return {name: pd.read_parquet(path) for name, path in paths.items()}
+    
+    def save_summaries(self, country_summary: pd.DataFrame, timeline: pd.DataFrame):
+        """Salva il riassunto per paese e la timeline"""
+        os.makedirs('data/processed', exist_ok=True)
+        country_summary.to_parquet('data/processed/country_summary_latest.parquet', index=False)
+        timeline.to_parquet('data/processed/timeline_latest.parquet', index=False)
 
 def main():
-    processor = DataProcessor()
+    parser = argparse.ArgumentParser(description='Elaborazione dei dati raccolti')
+    parser.add_argument(
+        '--full-rebuild',
+        action='store_true',
+        help='Ricalcola tutto dai file grezzi invece di elaborare solo quelli nuovi'
+    )
+    parser.add_argument(
+        '--max-memory-mb',
+        type=float,
+        default=None,
+        help='Ricostruzione completa a flusso, con lotti limitati a circa questa memoria '
+             '(più 24 byte per articolo per scartare i duplicati; '
+             'i file per notizia non vengono prodotti)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Processi per il punteggio dei frame grandi, utile per i backfill (default: 1)'
+    )
+    args = parser.parse_args()
     
-    # Carica i dati
-    df = processor.load_latest_data()
+    processor = DataProcessor(workers=args.workers)
+    try:
+        run_processing(processor, args)
+    finally:
+        processor.close()
+
+def run_processing(processor: DataProcessor, args):
+    state = AggregateState.load()
+    # Senza checkpoint lo stato esiste ma non ha file grezzi: non è un primo avvio
+    full_rebuild = args.full_rebuild or state.is_new()
     
-    if df.empty:
-        print("No data to process!")
+    if full_rebuild and args.max_memory_mb:
+        # Ricostruzione a flusso: lotti elaborati e scritti uno alla volta
+        processor.archive_processed_articles()
+        state.reset()
+        raw_files = processor.raw_files()
+        rollups = None
+        country_names = list(processor.country_keywords)
+        with article_store.ProcessedArticlesWriter(country_names) as writer, \
+                article_index.ArticleIndexWriter(country_names) as index_writer:
+            for batch in processor.iter_latest_data(raw_files, max_memory_mb=args.max_memory_mb):
+                batch = processor.process_articles(batch)
+                processor.evaluate_alerts(state, state.update(batch, []))
+                writer.write(batch)
+                index_writer.write(batch)
+                batch_rollups = processor.create_rollups(batch)
+                rollups = batch_rollups if rollups is None else processor.merge_rollups(rollups, batch_rollups)
+                print(f"Processed batch of {len(batch)} articles")
+        state.files.extend(raw_files)
+        
+        country_summary = state.country_summary()
+        timeline = state.timeline()
+        processor.save_summaries(country_summary, timeline)
+        if rollups is not None:
+            processor.save_rollups(rollups)
+        # I raggruppamenti per notizia richiedono tutti gli articoli insieme
+        # (assign_stories): quelli di un'elaborazione precedente non valgono più
+        for path in ('data/processed/stories_latest.parquet',
+                     'data/processed/country_summary_stories_latest.parquet'):
+            if os.path.exists(path):
+                os.remove(path)
+        state.save()
+        
+        print(f"\nProcessing complete!")
+        print(f"Total articles: {len(state)}")
+        if not country_summary.empty:
+            print(f"\nTop 5 countries by tension:")
+            print(country_summary.head()[['country', 'avg_tension', 'article_count']])
         return
     
-    # Processa i dati
-    df_processed = processor.process_articles(df)
-    country_summary = processor.create_country_summary(df_processed)
-    timeline = processor.create_timeline(df_processed)
+    if full_rebuild:
+        result = processor.process_full(state)
+        if result is None:
+            print("No data to process!")
+            return
+    else:
+        result = processor.process_incremental(state)
+        if result is None:
+            print("No new raw files to process!")
+            return
+    df_processed, country_summary, timeline = result
+    
+    # Raggruppa gli articoli sulla stessa notizia provenienti da fonti diverse
+    df_processed = processor.assign_stories(df_processed)
     
     # Salva i risultati
     processor.save_processed_data(df_processed, country_summary, timeline)
+    state.save()
     
     # Mostra statistiche
     print(f"\nProcessing complete!")
@@ -215,5 +836,19 @@ def main():
         print(f"\nTop 5 countries by tension:")
         print(country_summary.head()[['country', 'avg_tension', 'article_count']])
 
+# Processore di ogni worker del pool, creato una volta per processo
+_worker_processor = None
+
+def _init_score_worker(word_boundary, country_keywords, severity_weights, critical_combinations):
+    global _worker_processor
+    _worker_processor = DataProcessor(word_boundary)
+    _worker_processor.country_keywords = country_keywords
+    _worker_processor.severity_weights = severity_weights
+    _worker_processor.critical_combinations = critical_combinations
+
+def _score_shard(table: pa.Table) -> Tuple[np.ndarray, np.ndarray]:
+    df = table.to_pandas()
+    return _worker_processor._score_arrays(df['title'], df['description'])
+
 if __name__ == "__main__":
     main()
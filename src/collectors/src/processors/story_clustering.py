@@ -0,0 +1,123 @@
+import re
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+_WORD = re.compile(r'\w+')
+_TAG = re.compile(r'<[^>]+>')
+
+
+def tokenize(text: str) -> List[str]:
+    """Parole del testo in minuscolo, senza tag HTML"""
+    return _WORD.findall(_TAG.sub(' ', text).lower())
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Finalizzatore splitmix64: distribuisce uniformemente gli interi a 64 bit"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def shingle_hashes(texts: List[str], shingle_size: int = 2):
+    """Hash degli shingle (sequenze di parole) di tutti i testi, concatenati"""
+    words, lengths = [], np.zeros(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        article_words = tokenize(text)
+        words.extend(article_words)
+        lengths[i] = len(article_words)
+
+    codes = pd.factorize(np.array(words, dtype=object))[0].astype(np.uint64) + np.uint64(1)
+    word_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # Shingle che iniziano in ogni posizione e restano dentro l'articolo
+    positions = np.arange(len(codes))
+    article = np.repeat(np.arange(len(texts)), lengths)
+    offset = positions - word_starts[article] if len(codes) else positions
+    size = np.minimum(shingle_size, lengths)
+    valid = offset <= (lengths[article] - size[article]) if len(codes) else positions.astype(bool)
+
+    hashes = np.zeros(int(valid.sum()), dtype=np.uint64)
+    starts_valid = positions[valid]
+    for k in range(shingle_size):
+        index = np.minimum(starts_valid + k, len(codes) - 1)
+        in_shingle = k < size[article[valid]]
+        hashes = _mix(hashes ^ np.where(in_shingle, codes[index], np.uint64(0)) + np.uint64(k))
+
+    counts = np.bincount(article[valid], minlength=len(texts)) if len(codes) else np.zeros(len(texts), dtype=np.int64)
+    # Articoli senza parole: uno shingle vuoto
+    empty = counts == 0
+    if empty.any():
+        insert_at = np.concatenate(([0], np.cumsum(counts)[:-1]))[empty]
+        hashes = np.insert(hashes, insert_at, np.uint64(0))
+        counts[empty] = 1
+
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return hashes, starts
+
+
+def minhash_signatures(texts: List[str], num_perm: int = 64, seed: int = 1,
+                       shingle_size: int = 2) -> np.ndarray:
+    """Firme MinHash (articoli x num_perm) calcolate su tutti i testi insieme"""
+    hashes, starts = shingle_hashes(texts, shingle_size)
+
+    # Hashing multiply-shift: (a * h + b) >> 32 con a dispari, in aritmetica modulo 2^64
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    # Blocchi di permutazioni per limitare la memoria a ~64 MB
+    block = max(1, (8 << 20) // max(1, len(hashes)))
+    for start in range(0, num_perm, block):
+        stop = min(num_perm, start + block)
+        permuted = ((a[start:stop, None] * hashes[None, :] + b[start:stop, None]) >> np.uint64(32)).astype(np.uint32)
+        signatures[:, start:stop] = np.minimum.reduceat(permuted, starts, axis=1).T
+    return signatures
+
+
+def lsh_clusters(signatures: np.ndarray, bands: int = 16, threshold: float = 0.5) -> np.ndarray:
+    """Raggruppa le firme simili con locality-sensitive hashing"""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = np.arange(n)
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for band in range(bands):
+        # Chiave del bucket: combinazione delle righe della banda (le collisioni
+        # producono solo candidati in più, scartati dalla verifica)
+        keys = np.zeros(n, dtype=np.uint64)
+        for column in signatures[:, band * rows:(band + 1) * rows].T:
+            keys = keys * np.uint64(1000003) ^ column.astype(np.uint64)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        
+        # Primo articolo (head) del bucket di ogni articolo, in ordine di chiave
+        new_bucket = np.ones(n, dtype=bool)
+        new_bucket[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        heads = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+        
+        candidates = np.flatnonzero(~new_bucket)
+        members, member_heads = order[candidates], heads[candidates]
+        similarity = (signatures[members] == signatures[member_heads]).mean(axis=1)
+        keep = similarity >= threshold
+        for head, member in zip(member_heads[keep], members[keep]):
+            root_a, root_b = find(head), find(member)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    roots = np.array([find(i) for i in range(n)])
+    _, labels = np.unique(roots, return_inverse=True)
+    # Rinumera in ordine di prima apparizione
+    first_seen = {}
+    return np.array([first_seen.setdefault(label, len(first_seen)) for label in labels], dtype=np.int64)
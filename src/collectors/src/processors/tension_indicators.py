@@ -0,0 +1,173 @@
+import json
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Finestre mobili degli indicatori, in secondi
+WINDOWS = {'1h': 3600, '6h': 6 * 3600, '24h': 24 * 3600, '7d': 7 * 24 * 3600}
+
+
+class TensionIndicators:
+    """Indicatori per paese su finestre mobili, aggiornati articolo per articolo"""
+
+    def __init__(self, path: str = 'data/processed/indicators.json', bucket_seconds: int = 300,
+                 alpha: float = 0.05, z_threshold: float = 2.0, min_articles: int = 3):
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        # Peso di ogni nuovo articolo nella media mobile esponenziale
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        # Articoli minimi nell'ultima ora per segnalare un'anomalia
+        self.min_articles = min_articles
+        self.spans = {name: max(1, seconds // bucket_seconds) for name, seconds in WINDOWS.items()}
+        self.history = max(self.spans.values())
+        self.reset()
+
+    def reset(self):
+        """Svuota lo stato (per una ricostruzione completa)"""
+        self.watermark = None
+        self.countries = {}
+
+    @classmethod
+    def load(cls, path: str = 'data/processed/indicators.json', **kwargs) -> 'TensionIndicators':
+        indicators = cls(path, **kwargs)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('bucket_seconds') == indicators.bucket_seconds:
+                indicators.watermark = data['watermark']
+                for country, saved in data['countries'].items():
+                    state = indicators._country(country)
+                    state['buckets'] = {int(bucket): values for bucket, values in saved['buckets'].items()}
+                    state['ewma'], state['ewvar'] = saved['ewma'], saved['ewvar']
+                    indicators._recompute_windows(state)
+        return indicators
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'bucket_seconds': self.bucket_seconds,
+                'watermark': self.watermark,
+                'countries': {
+                    country: {'buckets': state['buckets'], 'ewma': state['ewma'], 'ewvar': state['ewvar']}
+                    for country, state in self.countries.items()
+                }
+            }, f)
+
+    def _country(self, country: str) -> Dict:
+        if country not in self.countries:
+            self.countries[country] = {
+                'buckets': {},
+                'windows': {name: [0, 0.0] for name in self.spans},
+                'ewma': None,
+                'ewvar': 0.0
+            }
+        return self.countries[country]
+
+    def _recompute_windows(self, state: Dict):
+        state['windows'] = {name: [0, 0.0] for name in self.spans}
+        for bucket, (count, total) in state['buckets'].items():
+            for name, span in self.spans.items():
+                if bucket > self.watermark - span:
+                    state['windows'][name][0] += count
+                    state['windows'][name][1] += total
+
+    def update(self, df: pd.DataFrame):
+        """Aggiunge gli articoli processati di df (published, enhanced_tension_score, countries)"""
+        if df.empty:
+            return
+        ordered = df.sort_values('published', kind='stable')
+        seconds = pd.to_datetime(ordered['published']).to_numpy().astype('datetime64[s]').astype('int64')
+        for bucket, score, countries in zip((seconds // self.bucket_seconds).tolist(),
+                                            ordered['enhanced_tension_score'].tolist(), ordered['countries']):
+            for country in countries:
+                self._add(country, bucket, float(score))
+
+    def add(self, country: str, published: datetime, score: float):
+        """Aggiunge un articolo su un paese"""
+        self._add(country, int(pd.Timestamp(published).timestamp()) // self.bucket_seconds, score)
+
+    def _add(self, country: str, bucket: int, score: float):
+        if self.watermark is None or bucket > self.watermark:
+            self._advance(bucket)
+        if bucket <= self.watermark - self.history:
+            # Fuori da tutte le finestre: conta solo per l'EWMA
+            self._update_ewma(self._country(country), score)
+            return
+
+        state = self._country(country)
+        values = state['buckets'].setdefault(bucket, [0, 0.0])
+        values[0] += 1
+        values[1] += score
+        for name, span in self.spans.items():
+            if bucket > self.watermark - span:
+                state['windows'][name][0] += 1
+                state['windows'][name][1] += score
+        self._update_ewma(state, score)
+
+    def _update_ewma(self, state: Dict, score: float):
+        if state['ewma'] is None:
+            state['ewma'] = score
+            return
+        delta = score - state['ewma']
+        state['ewma'] += self.alpha * delta
+        state['ewvar'] = (1 - self.alpha) * (state['ewvar'] + self.alpha * delta * delta)
+
+    def _advance(self, bucket: int):
+        """Sposta il tempo in avanti, togliendo i secchi usciti dalle finestre"""
+        previous, self.watermark = self.watermark, bucket
+        if previous is None:
+            return
+        for state in self.countries.values():
+            buckets = state['buckets']
+            for name, span in self.spans.items():
+                window = state['windows'][name]
+                # La finestra passa da (previous - span, previous] a (bucket - span, bucket]
+                for expired in range(previous - span + 1, min(previous, bucket - span) + 1):
+                    if expired in buckets:
+                        window[0] -= buckets[expired][0]
+                        window[1] -= buckets[expired][1]
+                        if span == self.history:
+                            del buckets[expired]
+                if window[0] == 0:
+                    window[1] = 0.0
+
+    def snapshot(self) -> pd.DataFrame:
+        """Indicatori correnti per paese"""
+        rows = []
+        for country, state in sorted(self.countries.items()):
+            row = {'country': country}
+            for name in self.spans:
+                count, total = state['windows'][name]
+                row[f'count_{name}'] = count
+                row[f'mean_{name}'] = round(total / count, 2) if count else None
+            row['ewma'] = round(state['ewma'], 2) if state['ewma'] is not None else None
+            row['ewm_std'] = round(math.sqrt(state['ewvar']), 2)
+            row['zscore'] = self._zscore(state)
+            row['anomaly'] = (row['zscore'] is not None and row['zscore'] >= self.z_threshold
+                              and row['count_1h'] >= self.min_articles)
+            rows.append(row)
+
+        snapshot = pd.DataFrame(rows)
+        if not snapshot.empty:
+            snapshot['as_of'] = pd.Timestamp(self.watermark * self.bucket_seconds + self.bucket_seconds, unit='s')
+            snapshot = snapshot.sort_values(['anomaly', 'zscore'], ascending=False, na_position='last')
+        return snapshot
+
+    @staticmethod
+    def _zscore(state: Dict) -> Optional[float]:
+        # Media dell'ultima ora contro l'EWMA, in errori standard
+        count, total = state['windows']['1h']
+        std = math.sqrt(state['ewvar'])
+        if not count or state['ewma'] is None or std == 0:
+            return None
+        return round((total / count - state['ewma']) / (std / math.sqrt(count)), 2)
+
+    def anomalies(self) -> List[str]:
+        """Paesi con un'anomalia in corso"""
+        snapshot = self.snapshot()
+        return [] if snapshot.empty else snapshot.loc[snapshot['anomaly'], 'country'].tolist()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Moduli del collector e del processore, importati come fanno run.py e i benchmark
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(os.path.join(ROOT, 'src', 'collectors'))
+sys.path.append(os.path.join(ROOT, 'src', 'collectors', 'src', 'processors'))
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
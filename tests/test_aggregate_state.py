@@ -0,0 +1,68 @@
+import json
+
+import pandas as pd
+
+from aggregate_state import AggregateState
+
+
+def test_legacy_state_moves_article_records_to_the_database(tmp_path):
+    path = str(tmp_path / 'aggregate_state.json')
+    record = ['2024-03-01T10:00:00', 4.0, ['Ukraine']]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'files': ['news_1.json'], 'articles': {AggregateState.article_key('bbc', 'A'): record},
+                   'countries': {'Ukraine': {'count': 1, 'sum': 4.0, 'max': 4.0, 'last_update': record[0]}},
+                   'dates': {'2024-03-01': {'count': 1, 'sum': 4.0, 'max': 4.0, 'last_update': record[0],
+                                            'countries': {'Ukraine': 1}}}}, f)
+    state = AggregateState.load(path)
+    state.save()
+
+    state = AggregateState.load(path)
+    # Lo stesso articolo ripubblicato sostituisce quello migrato
+    state.update(pd.DataFrame({'source': ['bbc'], 'title': ['A'], 'published': [pd.Timestamp('2024-03-02')],
+                               'enhanced_tension_score': [2.0], 'countries': [['Ukraine']]}), [])
+
+    assert len(state) == 1
+    assert 'articles' not in json.load(open(path, encoding='utf-8'))
+    assert state.country_summary()[['avg_tension', 'article_count']].values.tolist() == [[2.0, 1]]
+    assert state.timeline()['date'].astype(str).tolist() == ['2024-03-02']
+
+
+def test_incremental_runs_match_a_full_rebuild(tmp_path, monkeypatch):
+    import article_store
+    from data_processor import DataProcessor
+
+    monkeypatch.chdir(tmp_path)
+    processor = DataProcessor()
+
+    def article(source, title, published):
+        return {'source': source, 'title': title, 'description': '', 'link': f'http://{source}/{title}',
+                'published': pd.Timestamp(published).to_pydatetime(), 'tension_score': 0.0}
+
+    # Due raccolte; la seconda ripubblica un titolo della prima con una data più recente
+    article_store.write_raw_articles([
+        article('bbc', 'War in Ukraine', '2024-03-01 10:00'),
+        article('bbc', 'Sanctions on Russia', '2024-03-01 12:00'),
+        article('cnn', 'Israel and Iran tension', '2024-03-02 09:00')
+    ])
+    state = AggregateState.load()
+    processor.process_incremental(state)
+    state.save()
+    article_store.write_raw_articles([
+        article('bbc', 'War in Ukraine', '2024-03-03 08:00'),
+        article('cnn', 'China military crisis', '2024-03-03 11:00')
+    ])
+    _, country_summary, timeline = processor.process_incremental(AggregateState.load())
+
+    _, full_summary, full_timeline = processor.process_full(AggregateState('full/aggregate_state.json'))
+
+    def normalized(df, key):
+        return df.sort_values(key).reset_index(drop=True).astype({key: str})
+
+    pd.testing.assert_frame_equal(normalized(country_summary, 'country'), normalized(full_summary, 'country'),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(normalized(timeline, 'date'), normalized(full_timeline, 'date'),
+                                  check_dtype=False)
+    # L'articolo ripubblicato conta una volta, nel giorno più recente
+    ukraine = country_summary.set_index('country').loc['Ukraine']
+    assert ukraine['article_count'] == 1
+    assert str(ukraine['last_update']) == '2024-03-03 08:00:00'
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+import article_store
+
+
+def _article(title):
+    return {'title': title, 'description': '', 'link': f'https://example.com/{title}',
+            'published': datetime(2024, 1, 1, 12), 'source': 'bbc', 'tension_score': 0.0,
+            'countries_mentioned': [], 'collected_at': datetime(2024, 1, 1, 12)}
+
+
+def test_writes_in_the_same_second_keep_both_files(tmp_path):
+    base_dir = str(tmp_path / 'articles')
+    first = article_store.write_raw_articles([_article('A')], base_dir)
+    second = article_store.write_raw_articles([_article('B')], base_dir)
+
+    assert set(first).isdisjoint(second)
+    assert len(article_store.raw_files(base_dir)) == 2
@@ -0,0 +1,28 @@
+from dedup_index import DedupIndex
+
+
+def test_collected_digests_do_not_lock_the_index(tmp_path):
+    path = str(tmp_path / 'dedup_index.sqlite3')
+    daemon, collect = DedupIndex(path), DedupIndex(path)
+
+    # Raccolta in corso nel daemon: nessuna transazione aperta sul file
+    assert daemon.add('bbc', 'https://example.com/a', 'A')
+    assert collect.add('bbc', 'https://example.com/b', 'B')
+    collect.commit()
+
+    assert not daemon.add('bbc', 'https://example.com/b?utm_source=rss', 'B')
+    daemon.commit()
+    assert len(collect) == 2
+
+
+def test_commit_writes_only_the_given_sources(tmp_path):
+    index = DedupIndex(str(tmp_path / 'dedup_index.sqlite3'))
+    index.add('bbc', 'https://example.com/a', 'A')
+    index.add('dw', 'https://example.com/b', 'B')
+
+    index.commit(['bbc'])
+    index.rollback(['dw'])
+
+    assert len(index) == 1
+    assert index.add('dw', 'https://example.com/b', 'B')
+    assert not index.add('bbc', 'https://example.com/a', 'A')
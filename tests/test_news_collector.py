@@ -0,0 +1,69 @@
+import time
+from datetime import datetime
+
+from feed_server import FeedServer, make_rss, sample_items
+from news_collector import NewsCollector
+
+
+class FakeFeed:
+    def __init__(self, entries):
+        self.entries = entries
+
+
+def fake_fetch(collector, feeds):
+    def fetch(source, url, timeout, cutoff_time=None):
+        collector.fetch_stats[source] = {
+            'fetch_seconds': 0.0, 'parse_seconds': 0.0, 'bytes': 0, 'entries': len(feeds[source].entries),
+            'kept': 0, 'duplicates': 0, 'not_modified': False, 'error': None, 'parser': 'feedparser'
+        }
+        return source, feeds[source]
+    return fetch
+
+
+def test_entry_errors_only_affect_their_feed(tmp_path):
+    now = datetime.now().timetuple()
+    collector = NewsCollector(cache_path=None, dedup_path=str(tmp_path / 'dedup.sqlite3'), poll_state_path=None)
+    collector.rss_feeds = {'good': 'http://good', 'broken': 'http://broken'}
+    feeds = {
+        'good': FakeFeed([{'title': 'Border dispute', 'link': 'http://good/1', 'published_parsed': now}]),
+        # Il secondo titolo non è una stringa: l'errore arriva dopo una voce valida
+        'broken': FakeFeed([{'title': 'Crisis', 'link': 'http://broken/1', 'published_parsed': now},
+                            {'title': None, 'link': 'http://broken/2', 'published_parsed': now}]),
+    }
+    collector._fetch_feed = fake_fetch(collector, feeds)
+
+    articles = collector.collect_news()
+
+    assert [article.source for article in articles] == ['good']
+    assert collector.fetch_stats['broken']['error']
+    # La voce valida del feed fallito sarà raccolta di nuovo
+    assert {source for source, _ in collector.dedup_index.pending.values()} == {'good'}
+
+
+def test_http_validators_are_kept_only_with_saved_articles(tmp_path):
+    from feed_cache import FeedCache
+
+    path = str(tmp_path / 'http_cache.json')
+    cache = FeedCache(path)
+    cache.record_miss('http://feed', {'ETag': '"v1"'})
+    assert cache.request_headers('http://feed') == {}
+
+    # Salvataggio non avvenuto: la prossima esecuzione scarica di nuovo il feed
+    assert FeedCache(path).request_headers('http://feed') == {}
+    cache.commit()
+    assert FeedCache(path).request_headers('http://feed') == {'If-None-Match': '"v1"'}
+
+
+def test_timeout_bounds_the_whole_download(tmp_path):
+    # Ogni KB arriva entro il timeout, ma il feed intero richiederebbe ~2s
+    rss = make_rss(sample_items(200))
+    with FeedServer({'/slow.xml': (rss, 0.0, 2.0 / (len(rss) / 1024))}) as server:
+        collector = NewsCollector(cache_path=None, dedup_path=str(tmp_path / 'dedup.sqlite3'), poll_state_path=None)
+        collector.rss_feeds = {'slow': server.url('/slow.xml')}
+
+        start = time.perf_counter()
+        articles = collector.collect_news(timeout=0.5)
+
+    assert articles == []
+    assert collector.fetch_stats['slow']['error']
+    assert time.perf_counter() - start < 1.5
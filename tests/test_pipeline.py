@@ -0,0 +1,90 @@
+import importlib.util
+import os
+from argparse import Namespace
+
+import pytest
+
+from feed_server import FeedServer, make_rss, sample_items
+
+RUN_PY = os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors',
+                      'dashboard', '.github', 'workflows', 'run.py')
+
+
+@pytest.fixture
+def feed_server():
+    feeds = {f'/feed_{i}.xml': (make_rss(sample_items(20, prefix=f'Feed{i}')), 0.0) for i in range(3)}
+    with FeedServer(feeds) as server:
+        yield server
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch, feed_server):
+    import news_collector
+
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location('run', RUN_PY)
+    run = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run)
+    run.setup_environment()
+
+    class LocalCollector(news_collector.NewsCollector):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.rss_feeds = {path[1:-4]: feed_server.url(path) for path in feed_server.feeds}
+
+    monkeypatch.setattr(news_collector, 'NewsCollector', LocalCollector)
+    return run
+
+
+@pytest.mark.parametrize('full_rebuild, max_memory_mb', [(False, None), (True, None), (True, 0.05)])
+def test_processing_keeps_articles_collected_without_checkpoint(run, feed_server, full_rebuild, max_memory_mb):
+    import article_store
+    from aggregate_state import AggregateState
+    from data_processor import DataProcessor, run_processing
+
+    # run.py all --no-checkpoint: 60 articoli solo nei dati processati
+    assert run.run_pipeline(checkpoint=False)
+    assert len(article_store.read_articles(columns=['title'])) == 60
+    # run.py collect: 10 articoli nuovi nell'archivio grezzo
+    feed_server.feeds['/feed_0.xml'] = (make_rss(sample_items(30, prefix='Feed0')), 0.0)
+    run.collect_data()
+
+    run_processing(DataProcessor(), Namespace(full_rebuild=full_rebuild, max_memory_mb=max_memory_mb))
+
+    assert len(AggregateState.load()) == 70
+    assert len(article_store.read_articles(columns=['title'])) == 70
+
+
+@pytest.mark.parametrize('max_memory_mb', [None, 0.05])
+def test_full_rebuild_evaluates_alert_rules(run, max_memory_mb):
+    from data_processor import DataProcessor, run_processing
+
+    class RecordingAlerts:
+        def __init__(self):
+            self.evaluated = 0
+
+        def evaluate(self, df, indicators=None):
+            self.evaluated += len(df)
+
+    run.collect_data()
+    processor = DataProcessor()
+    processor.alerts = RecordingAlerts()
+    run_processing(processor, Namespace(full_rebuild=True, max_memory_mb=max_memory_mb))
+
+    assert processor.alerts.evaluated == 60
+
+
+def test_report_rebuilds_a_missing_article_index(run, capsys):
+    import article_index
+
+    assert run.run_pipeline()
+    # L'indice SQLite non è versionato: dopo un checkout c'è solo l'istantanea Parquet
+    os.remove(article_index.ARTICLE_INDEX)
+    capsys.readouterr()
+
+    run.generate_report()
+
+    output = capsys.readouterr().out
+    assert 'Nessun dato' not in output
+    assert 'Total articles analyzed: 60' in output
+    assert os.path.exists(article_index.ARTICLE_INDEX)
@@ -0,0 +1,95 @@
+import importlib.util
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+RUN_PY = os.path.join(os.path.dirname(__file__), '..', 'src', 'collectors', 'src', 'processors',
+                      'dashboard', '.github', 'workflows', 'run.py')
+
+
+class FakeFeed:
+    def __init__(self, entries):
+        self.entries = entries
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location('run', RUN_PY)
+    run = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run)
+
+    daemon = run.PipelineDaemon(queue_size=1)
+    collector = daemon.collector
+    collector.rss_feeds = {f'feed_{i}': f'http://feed_{i}' for i in range(3)}
+    now = datetime.now().timetuple()
+
+    def fetch(source, url, timeout, cutoff_time=None):
+        # Download lenti: all'arresto ci sono risultati in coda e in corso
+        time.sleep(0.2)
+        entries = [{'title': f'{source} border crisis {i}', 'link': f'{url}/{i}', 'published_parsed': now}
+                   for i in range(5)]
+        collector.fetch_stats[source] = {
+            'fetch_seconds': 0.2, 'parse_seconds': 0.0, 'bytes': 0, 'entries': len(entries), 'kept': 0,
+            'duplicates': 0, 'not_modified': False, 'error': None, 'parser': 'feedparser'
+        }
+        return source, FakeFeed(entries)
+
+    collector._fetch_feed = fetch
+    yield daemon
+    daemon.collector.dedup_index.close()
+
+
+def test_stop_processes_queued_and_in_flight_results(daemon):
+    daemon.processing_thread.start()
+    for source in daemon.collector.rss_feeds:
+        daemon._start_fetch(source)
+    daemon.stop()
+
+    assert len(daemon.state) == 15
+    assert len(daemon.collector.dedup_index) == 15
+    assert not daemon.in_flight
+
+
+def test_batch_commits_only_its_own_feeds(daemon):
+    articles = daemon.collector.collect_feed('feed_0')
+    daemon.collector.collect_feed('feed_1')
+
+    daemon._process_batch(articles, ['feed_0'])
+
+    assert len(daemon.collector.dedup_index) == 5
+    assert {source for source, _ in daemon.collector.dedup_index.pending.values()} == {'feed_1'}
+
+
+def test_batches_append_to_processed_data(daemon):
+    import article_index
+    import article_store
+
+    daemon._process_batch(daemon.collector.collect_feed('feed_0'), ['feed_0'])
+    snapshot = set(article_store.raw_files(article_store.PROCESSED_STORE))
+    index_inode = os.stat(article_index.ARTICLE_INDEX).st_ino
+
+    daemon._process_batch(daemon.collector.collect_feed('feed_1'), ['feed_1'])
+
+    # Le righe nuove si aggiungono: file e indice esistenti non vengono riscritti
+    files = set(article_store.raw_files(article_store.PROCESSED_STORE))
+    assert snapshot < files
+    assert os.stat(article_index.ARTICLE_INDEX).st_ino == index_inode
+    with article_index.ArticleIndex() as index:
+        assert index.stats()['article_count'] == 10
+
+    processor = daemon.processor
+    df = processor.load_processed_articles()
+    assert len(df) == 10
+    # Stessi raggruppamenti di assign_stories sull'intero archivio
+    full = processor.assign_stories(df.drop(columns='story_id'))
+    assert df.groupby('story_id')['title'].apply(frozenset).sort_values().tolist() == \
+        full.groupby('story_id')['title'].apply(frozenset).sort_values().tolist()
+
+    stories = processor.collapse_stories(df)
+    saved = pd.read_parquet('data/processed/stories_latest.parquet')
+    assert saved['article_count'].tolist() == stories['article_count'].tolist()
+    assert pd.read_parquet('data/processed/rollups/metrics.parquet')['article_count'].tolist() == [10]
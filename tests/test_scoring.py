@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+from synthetic import generate_articles
+
+
+@pytest.mark.parametrize('dtype', ['string[pyarrow]', object])
+def test_word_boundary_batch_matches_analyze_text_on_unicode_text(dtype):
+    processor = DataProcessor(word_boundary=True)
+    titles = pd.Series(['ßconflict near Ukraine', 'Straßeconflict éwar in Kyiv', 'Conflict and war in Ukraine',
+                        'Ukraine_war 2missile'], dtype=dtype)
+    descriptions = pd.Series(['', 'sanctionsß', 'military strike', 'crisis—attack'], dtype=dtype)
+
+    batch = processor.score_batch(titles, descriptions)
+
+    for title, description, (_, row) in zip(titles, descriptions, batch.iterrows()):
+        countries, score = processor.analyze_text(f'{title} {description}'.lower())
+        assert sorted(row['countries']) == sorted(countries)
+        assert row['enhanced_tension_score'] == score
+
+
+@pytest.mark.parametrize('word_boundary', [False, True])
+def test_batch_matches_analyze_text_on_synthetic_articles(word_boundary):
+    processor = DataProcessor(word_boundary=word_boundary)
+    df = pd.DataFrame(generate_articles(2000, keyword_density=0.5))
+
+    batch = processor.score_batch(df['title'], df['description'])
+
+    expected = [processor.analyze_text(f'{title} {description}') for title, description in zip(df['title'], df['description'])]
+    assert [sorted(countries) for countries in batch['countries']] == [sorted(countries) for countries, _ in expected]
+    assert batch['enhanced_tension_score'].tolist() == [score for _, score in expected]
+
+
+@pytest.mark.parametrize('text', [
+    'Warnings of WAR: north  korea, North Korea’s missiles', 'ßconflict sanctions_list kyiv-based',
+    'Iranian and Iran; russia/ukraine', 'xi jinpingß and Kim Jong-un', ''
+])
+def test_keyword_matcher_matches_substring_and_word_semantics(text):
+    import re
+
+    from keyword_matcher import KeywordMatcher
+
+    terms = ['war', 'warning', 'north korea', 'korea', 'conflict', 'sanctions', 'kyiv', 'iran', 'iranian',
+             'russia', 'ukraine', 'xi jinping', 'kim jong', 'missile']
+    lowered = text.lower()
+
+    assert KeywordMatcher(terms).find(text) == {term for term in terms if term in lowered}
+    assert KeywordMatcher(terms, word_boundary=True).find(text) == {
+        term for term in terms if re.search(rf'\b{re.escape(term)}\b', lowered)
+    }
+    # La versione a colonne trova le stesse parole chiave
+    for word_boundary in (False, True):
+        matcher = KeywordMatcher(terms, word_boundary=word_boundary)
+        masks = matcher.masks([text, 'unrelated text'])
+        assert {term for term, found in zip(matcher.terms, masks[0]) if found} == matcher.find(text)
+
+
+@pytest.mark.parametrize('word_boundary', [False, True])
+def test_parallel_scoring_matches_serial(word_boundary):
+    df = pd.DataFrame(generate_articles(500, keyword_density=0.5))
+    serial = DataProcessor(word_boundary=word_boundary).score_batch(df['title'], df['description'])
+
+    processor = DataProcessor(word_boundary=word_boundary, workers=2)
+    # Anche un frame piccolo passa dal pool (4 blocchi da 125 righe)
+    processor.parallel_min_rows = 0
+    try:
+        parallel = processor.score_batch(df['title'], df['description'])
+        assert processor._pool is not None
+    finally:
+        processor.close()
+
+    pd.testing.assert_frame_equal(parallel, serial)
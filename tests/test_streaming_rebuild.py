@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pandas as pd
+
+from data_processor import DataProcessor
+from synthetic import generate_articles, write_raw_archive
+
+
+def test_iter_raw_frames_reads_json_files_larger_than_a_batch(tmp_path):
+    articles = generate_articles(2500, end=datetime(2024, 3, 1))
+    files = write_raw_archive(articles, str(tmp_path), files=2)
+
+    frames = list(DataProcessor()._iter_raw_frames(files, rows_per_batch=300))
+
+    assert all(len(frame) <= 300 for frame in frames)
+    assert sum(len(frame) for frame in frames) == len(articles)
+    assert pd.concat(frames)['_position'].tolist() == list(range(len(articles)))
+
+
+def test_streaming_rebuild_matches_in_memory_load(tmp_path):
+    articles = generate_articles(5000, end=datetime(2024, 3, 1))
+    # Duplicati (stessa fonte e titolo) da scartare come in load_latest_data
+    articles += [dict(article, published='2024-03-02T00:00:00') for article in articles[:200]]
+    files = write_raw_archive(articles, str(tmp_path), files=3)
+    processor = DataProcessor()
+
+    expected = processor.load_latest_data(files)
+    streamed = pd.concat(processor.iter_latest_data(files, max_memory_mb=0.05), ignore_index=True)
+
+    assert len(streamed) == len(expected) == 5000
+    key = ['source', 'title', 'published']
+    assert (streamed.sort_values(key)[key].reset_index(drop=True)
+            .equals(expected.sort_values(key)[key].reset_index(drop=True)))
+
+
+def test_full_rebuild_includes_articles_not_in_the_archive(tmp_path, monkeypatch):
+    from aggregate_state import AggregateState
+    from article_record import Article
+    from article_store import write_raw_articles
+
+    monkeypatch.chdir(tmp_path)
+    articles = [Article.from_dict(article) for article in generate_articles(300, end=datetime(2024, 3, 1))]
+    # Primo avvio senza checkpoint: metà nell'archivio, metà solo in memoria
+    write_raw_articles(articles[:150], 'data/store/raw')
+    state = AggregateState(str(tmp_path / 'aggregate_state.json'))
+
+    df, _, _ = DataProcessor().process_full(state, articles[150:])
+
+    assert len(df) == len(state) == 300
+
+
+def test_streaming_rebuild_removes_stale_story_files(tmp_path, monkeypatch):
+    from argparse import Namespace
+
+    from article_record import Article
+    from article_store import write_raw_articles
+    from data_processor import run_processing
+
+    monkeypatch.chdir(tmp_path)
+    articles = [Article.from_dict(article) for article in generate_articles(300, end=datetime(2024, 3, 1))]
+    write_raw_articles(articles, 'data/store/raw')
+    processor = DataProcessor()
+    # Prima elaborazione in memoria: scrive anche i file per notizia
+    run_processing(processor, Namespace(full_rebuild=True, max_memory_mb=None))
+    assert (tmp_path / 'data/processed/stories_latest.parquet').exists()
+
+    run_processing(processor, Namespace(full_rebuild=True, max_memory_mb=0.05))
+
+    assert not (tmp_path / 'data/processed/stories_latest.parquet').exists()
+    assert not (tmp_path / 'data/processed/country_summary_stories_latest.parquet').exists()